@@ -2,57 +2,83 @@
 """
 Esempio avanzato di richiesta chiavi con parametri opzionali ETSI GS QKD 014.
 Dimostra l'uso di additional_slave_SAE_IDs e extension parameters.
+
+Le richieste 1-4 sono indipendenti tra loro: vengono inviate in parallelo
+sulle connessioni keep-alive del client e i risultati stampati in ordine.
+
+Uso (dalla directory principale del progetto):
+    python -m examples.advanced_key_request
+    python -m examples.advanced_key_request --json   # JSON Lines, una riga per richiesta
 """
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 from src.alice_client import alice_client
 from src.utils import QKDClientError
 
+# (titolo, parametri di get_key, descrizione delle chiavi ricevute)
+REQUESTS = [
+    ("1. Richiesta semplice (1 chiave da 256 bit):",
+     dict(number=1, size=256), "chiavi"),
+    ("2. Richiesta multipla (3 chiavi da 512 bit):",
+     dict(number=3, size=512), "chiavi"),
+    ("3. Richiesta con SAE ID aggiuntivi (multicast):",
+     dict(number=1, size=256, additional_slave_SAE_IDs=["Charlie2", "David2"]),
+     "chiavi per comunicazione multicast"),
+    ("4. Richiesta con parametri di estensione:",
+     dict(number=1, size=256,
+          extension_mandatory={"priority": "high"},
+          extension_optional={"purpose": "authentication"}),
+     "chiavi con estensioni"),
+]
+
+def request_keys(client, params):
+    """Esegue una get_key verso Bob2 e ritorna (risposta, errore)"""
+    try:
+        return client.get_key(slave_id="Bob2", **params), None
+    # Anche gli errori di rete restano nel risultato: un fallimento non
+    # deve far perdere le altre risposte raccolte da executor.map
+    except (QKDClientError, requests.RequestException) as e:
+        return None, e
+
 def main():
-    client = alice_client()
+    parser = argparse.ArgumentParser(
+        description="Richieste di chiavi con parametri opzionali ETSI GS QKD 014"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Stampa un oggetto JSON per richiesta (JSON Lines) invece del testo"
+    )
+    args = parser.parse_args()
     
-    print("=== Esempio richiesta chiavi avanzata ===\n")
+    client = alice_client()
     
-    # Esempio 1: Richiesta semplice
-    print("1. Richiesta semplice (1 chiave da 256 bit):")
-    try:
-        resp = client.get_key(slave_id="Bob2", number=1, size=256)
-        print(f"   ✓ Ricevute {len(resp.get('keys', []))} chiavi")
-    except QKDClientError as e:
-        print(f"   ✗ Errore: {e}")
+    if not args.json:
+        print("=== Esempio richiesta chiavi avanzata ===")
     
-    # Esempio 2: Richieste multiple chiavi
-    print("\n2. Richiesta multipla (3 chiavi da 512 bit):")
-    try:
-        resp = client.get_key(slave_id="Bob2", number=3, size=512)
-        print(f"   ✓ Ricevute {len(resp.get('keys', []))} chiavi")
-    except QKDClientError as e:
-        print(f"   ✗ Errore: {e}")
+    # Esempi 1-4: richieste indipendenti inviate in parallelo
+    with ThreadPoolExecutor(max_workers=min(len(REQUESTS), client.pool_maxsize)) as executor:
+        results = list(executor.map(
+            lambda request: request_keys(client, request[1]), REQUESTS
+        ))
     
-    # Esempio 3: Con SAE ID aggiuntivi (multicast)
-    print("\n3. Richiesta con SAE ID aggiuntivi (multicast):")
-    try:
-        resp = client.get_key(
-            slave_id="Bob2",
-            number=1,
-            size=256,
-            additional_slave_SAE_IDs=["Charlie2", "David2"]
-        )
-        print(f"   ✓ Ricevute {len(resp.get('keys', []))} chiavi per comunicazione multicast")
-    except QKDClientError as e:
-        print(f"   ✗ Errore: {e}")
+    if args.json:
+        for index, (resp, error) in enumerate(results, 1):
+            print(json.dumps({
+                "request": index, "success": error is None,
+                "response": resp, "error": None if error is None else str(error),
+            }))
+        return
     
-    # Esempio 4: Con extension parameters
-    print("\n4. Richiesta con parametri di estensione:")
-    try:
-        resp = client.get_key(
-            slave_id="Bob2",
-            number=1,
-            size=256,
-            extension_mandatory={"priority": "high"},
-            extension_optional={"purpose": "authentication"}
-        )
-        print(f"   ✓ Ricevute {len(resp.get('keys', []))} chiavi con estensioni")
-    except QKDClientError as e:
-        print(f"   ✗ Errore: {e}")
+    for (title, _, label), (resp, error) in zip(REQUESTS, results):
+        print(f"\n{title}")
+        if error is None:
+            print(f"   ✓ Ricevute {len(resp.get('keys') or [])} {label}")
+        else:
+            print(f"   ✗ Errore: {error}")
     
     # Esempio 5: Errore intenzionale - size non multiplo di 8
     print("\n5. Test validazione - size non multiplo di 8:")
@@ -63,4 +89,4 @@ def main():
         print(f"   ✓ Validazione corretta: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
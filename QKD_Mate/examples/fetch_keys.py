@@ -6,15 +6,73 @@ Esempio completo del flusso master/slave per lo scambio di chiavi QKD secondo ET
 2. Alice riceve la chiave e il key_ID
 3. Alice comunica il key_ID a Bob attraverso il canale classico
 4. Bob (slave) usa il key_ID per recuperare la stessa chiave dal suo KME
+
+Uso (dalla directory principale del progetto):
+    python -m examples.fetch_keys
+    python -m examples.fetch_keys --json   # JSON Lines su stdout, una riga per step
 """
 import argparse
+import contextlib
 import json
+import sys
+from operator import itemgetter
 from src.alice_client import alice_client
 from src.bob_client import bob_client
 from src.utils import QKDClientError
 
-def fetch_keys_as_master(client, slave_id, number=1, size=256):
-    """Alice (master) richiede chiavi per comunicare con Bob (slave)"""
+PREVIEW_LEN = 32  # Caratteri della chiave mostrati a schermo
+
+# Parser costruito una sola volta all'import del modulo
+_PARSER = argparse.ArgumentParser(
+    description="Esempio di scambio chiavi QKD master/slave secondo ETSI GS QKD 014"
+)
+_PARSER.add_argument(
+    "--mode", 
+    choices=["full", "master", "slave"], 
+    default="full",
+    help="Modalità: full (esempio completo), master (solo Alice), slave (solo Bob con key_ID)"
+)
+_PARSER.add_argument(
+    "--number", 
+    type=int, 
+    default=1, 
+    help="Numero di chiavi da richiedere"
+)
+_PARSER.add_argument(
+    "--size", 
+    type=int, 
+    default=256, 
+    help="Dimensione delle chiavi in bit (multiplo di 8)"
+)
+_PARSER.add_argument(
+    "--key-ids",
+    nargs="+",
+    help="Key IDs da usare in modalità slave (richiesto per --mode slave)"
+)
+_PARSER.add_argument(
+    "--quiet",
+    action="store_true",
+    help="Non stampare le singole chiavi (utile con --number elevati)"
+)
+_PARSER.add_argument(
+    "--json",
+    action="store_true",
+    help="Stampa su stdout un oggetto JSON per step (JSON Lines), il resto su stderr"
+)
+
+def print_key(index, key):
+    """Stampa key_ID e un'anteprima troncata della chiave"""
+    value = key['key']
+    preview = value if len(value) <= PREVIEW_LEN else value[:PREVIEW_LEN] + "..."
+    print(f"\nChiave {index}:\n  - key_ID: {key['key_ID']}\n  - key: {preview}")
+
+def fetch_keys_as_master(client, slave_id, number=1, size=256, verbose=True):
+    """Alice (master) richiede chiavi per comunicare con Bob (slave)
+    
+    Tutte le `number` chiavi arrivano in un'unica richiesta enc_keys:
+    non richiedere le chiavi una alla volta in un ciclo.
+    Con verbose=False le singole chiavi non vengono stampate.
+    """
     print(f"\n=== MASTER: Richiesta chiavi per slave {slave_id} ===")
     try:
         # Richiedi chiavi
@@ -24,26 +82,25 @@ def fetch_keys_as_master(client, slave_id, number=1, size=256):
             size=size
         )
         
+        keys = resp.get('keys') or []
         print(f"Risposta ricevuta:")
-        print(f"  - keys ricevute: {len(resp.get('keys', []))}")
+        print(f"  - keys ricevute: {len(keys)}")
         
-        keys_info = []
-        for i, key in enumerate(resp.get('keys', [])):
-            print(f"\nChiave {i+1}:")
-            print(f"  - key_ID: {key['key_ID']}")
-            print(f"  - key: {key['key'][:32]}..." if len(key['key']) > 32 else f"  - key: {key['key']}")
-            keys_info.append({
-                'key_ID': key['key_ID'],
-                'key': key['key']
-            })
+        if verbose:
+            for i, key in enumerate(keys, 1):
+                print_key(i, key)
         
-        return keys_info
+        return [{'key_ID': k['key_ID'], 'key': k['key']} for k in keys]
     except QKDClientError as e:
         print(f"Errore nella richiesta master: {e}")
         return []
 
-def fetch_keys_as_slave(client, master_id, key_ids):
-    """Bob (slave) recupera le chiavi usando i key_ID forniti da Alice"""
+def fetch_keys_as_slave(client, master_id, key_ids, verbose=True):
+    """Bob (slave) recupera le chiavi usando i key_ID forniti da Alice
+    
+    Tutti i key_ID vengono passati in un'unica richiesta dec_keys.
+    Con verbose=False le singole chiavi non vengono stampate.
+    """
     print(f"\n=== SLAVE: Recupero chiavi dal master {master_id} ===")
     print(f"Key IDs da recuperare: {key_ids}")
     
@@ -54,70 +111,50 @@ def fetch_keys_as_slave(client, master_id, key_ids):
             key_IDs=key_ids
         )
         
+        keys = resp.get('keys') or []
         print(f"\nRisposta ricevuta:")
-        print(f"  - keys recuperate: {len(resp.get('keys', []))}")
+        print(f"  - keys recuperate: {len(keys)}")
         
-        for i, key in enumerate(resp.get('keys', [])):
-            print(f"\nChiave {i+1}:")
-            print(f"  - key_ID: {key['key_ID']}")
-            print(f"  - key: {key['key'][:32]}..." if len(key['key']) > 32 else f"  - key: {key['key']}")
+        if verbose:
+            for i, key in enumerate(keys, 1):
+                print_key(i, key)
         
-        return resp.get('keys', [])
+        return keys
     except QKDClientError as e:
         print(f"Errore nella richiesta slave: {e}")
         return []
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Esempio di scambio chiavi QKD master/slave secondo ETSI GS QKD 014"
-    )
-    parser.add_argument(
-        "--mode", 
-        choices=["full", "master", "slave"], 
-        default="full",
-        help="Modalità: full (esempio completo), master (solo Alice), slave (solo Bob con key_ID)"
-    )
-    parser.add_argument(
-        "--number", 
-        type=int, 
-        default=1, 
-        help="Numero di chiavi da richiedere"
-    )
-    parser.add_argument(
-        "--size", 
-        type=int, 
-        default=256, 
-        help="Dimensione delle chiavi in bit (multiplo di 8)"
-    )
-    parser.add_argument(
-        "--key-ids",
-        nargs="+",
-        help="Key IDs da usare in modalità slave (richiesto per --mode slave)"
-    )
-    
-    args = parser.parse_args()
+def _no_emit(step, **data):
+    """Emissione JSON disattivata (output solo testuale)"""
+
+def run(args, emit=_no_emit):
+    """Esegue il flusso scelto con --mode; emit(step, **dati) riceve il risultato di ogni step"""
+    verbose = not args.quiet
     
     if args.mode == "full":
         print("=== ESEMPIO COMPLETO FLUSSO MASTER/SLAVE ===")
         
         # Step 1: Alice (master) richiede chiavi
         alice = alice_client()
-        keys = fetch_keys_as_master(alice, "Bob2", args.number, args.size)
+        keys = fetch_keys_as_master(alice, "Bob2", args.number, args.size, verbose)
+        emit("master", slave_id="Bob2", keys=keys)
         
         if not keys:
             print("\nNessuna chiave ricevuta dal master, interruzione.")
             return
         
         # Step 2: Estrai i key_ID
-        key_ids = [k['key_ID'] for k in keys]
+        key_ids = list(map(itemgetter('key_ID'), keys))
         print(f"\n>>> Key IDs da comunicare a Bob: {key_ids}")
         
         # Step 3: Bob (slave) recupera le chiavi
         print("\n[Simulazione: Alice comunica i key_ID a Bob via canale classico]")
         bob = bob_client()
-        slave_keys = fetch_keys_as_slave(bob, "Alice2", key_ids)
+        slave_keys = fetch_keys_as_slave(bob, "Alice2", key_ids, verbose)
+        emit("slave", master_id="Alice2", keys=slave_keys)
         
         # Step 4: Verifica
+        emit("verify", success=len(keys) == len(slave_keys), count=len(slave_keys))
         if len(keys) == len(slave_keys):
             print("\n✓ Scambio chiavi completato con successo!")
             print(f"  Alice e Bob ora condividono {len(keys)} chiavi QKD")
@@ -127,20 +164,36 @@ def main():
     elif args.mode == "master":
         # Solo la parte master
         alice = alice_client()
-        keys = fetch_keys_as_master(alice, "Bob2", args.number, args.size)
+        keys = fetch_keys_as_master(alice, "Bob2", args.number, args.size, verbose)
+        emit("master", slave_id="Bob2", keys=keys)
         if keys:
-            key_ids = [k['key_ID'] for k in keys]
+            key_ids = list(map(itemgetter('key_ID'), keys))
             print(f"\n>>> Key IDs da comunicare al slave: {key_ids}")
     
     elif args.mode == "slave":
         # Solo la parte slave
         if not args.key_ids:
             print("Errore: --key-ids richiesto in modalità slave")
-            parser.print_help()
+            _PARSER.print_help()
             return
         
         bob = bob_client()
-        fetch_keys_as_slave(bob, "Alice2", args.key_ids)
+        slave_keys = fetch_keys_as_slave(bob, "Alice2", args.key_ids, verbose)
+        emit("slave", master_id="Alice2", keys=slave_keys)
+
+def main():
+    args = _PARSER.parse_args()
+    
+    if args.json:
+        # JSON Lines per script/pipeline: stdout riservato agli step,
+        # tutto il testo decorato va su stderr
+        out = sys.stdout
+        def emit(step, **data):
+            out.write(json.dumps({"step": step, **data}) + "\n")
+        with contextlib.redirect_stdout(sys.stderr):
+            run(args, emit)
+    else:
+        run(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
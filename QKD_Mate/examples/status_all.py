@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Esempio di verifica contemporanea dello stato dei link QKD di Alice e Bob.
+
+Le due richieste GET /status vanno a KME diversi e sono indipendenti:
+vengono eseguite in parallelo, quindi il tempo totale è quello del KME
+più lento invece della somma dei due.
+
+Uso (dalla directory principale del progetto):
+    python -m examples.status_all
+    python -m examples.status_all --format verbose
+    python -m examples.status_all --json   # JSON Lines, una riga per nodo
+"""
+import argparse
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from src.alice_client import alice_client
+from src.bob_client import bob_client
+from src.utils import QKDClientError
+
+# Campi della risposta di status (ETSI GS QKD 014, sezione 6.1) mostrati in --format verbose
+FIELDS = (
+    "source_KME_ID", "target_KME_ID", "master_SAE_ID", "slave_SAE_ID",
+    "key_size", "stored_key_count", "max_key_count", "max_key_per_request",
+    "max_key_size", "min_key_size", "max_SAE_ID_count",
+)
+# Template precompilato: un solo format_map e una sola print per nodo
+STATUS_TEMPLATE = "\n".join(f"  - {field}: {{{field}}}" for field in FIELDS)
+
+def fetch_status(name, client_factory, peer_id):
+    """Crea il client del nodo e interroga lo stato del link verso peer_id"""
+    start = time.perf_counter()
+    try:
+        status = client_factory().get_status(peer_id)
+        return name, status, None, time.perf_counter() - start
+    except (QKDClientError, requests.RequestException) as e:
+        return name, None, e, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stato dei link QKD di Alice e Bob interrogati in parallelo"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["brief", "verbose"],
+        default="brief",
+        help="brief: una riga per nodo, verbose: tutti i campi della risposta di status"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Stampa un oggetto JSON per nodo (JSON Lines) invece del testo"
+    )
+    args = parser.parse_args()
+
+    probes = [
+        ("Alice", alice_client, "Bob2"),
+        ("Bob", bob_client, "Alice2"),
+    ]
+
+    if not args.json:
+        print("=== Stato link QKD (Alice e Bob in parallelo) ===\n")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        results = list(executor.map(lambda probe: fetch_status(*probe), probes))
+    total = time.perf_counter() - start
+
+    if args.json:
+        for name, status, error, elapsed in results:
+            print(json.dumps({
+                "node": name, "success": error is None, "elapsed": round(elapsed, 3),
+                "response": status, "error": None if error is None else str(error),
+            }))
+        return
+
+    for name, status, error, elapsed in results:
+        if error is None:
+            print(f"✓ {name} ({elapsed:.2f}s): "
+                  f"{status.get('stored_key_count')} chiavi disponibili, "
+                  f"key_size {status.get('key_size')} bit")
+            if args.format == "verbose":
+                print(STATUS_TEMPLATE.format_map(defaultdict(lambda: "N/A", status)))
+                if "status_extension" in status:
+                    print(f"  - status_extension: {status['status_extension']}")
+        else:
+            print(f"✗ {name} ({elapsed:.2f}s): {error}")
+
+    print(f"\nTempo totale: {total:.2f}s")
+
+if __name__ == "__main__":
+    main()
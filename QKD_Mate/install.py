@@ -22,12 +22,23 @@ Uso:
 
 import os
 import sys
+import hashlib
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import subprocess
 import shutil
 import platform
+from datetime import datetime
+from importlib import metadata
 from pathlib import Path
 import json
 
+try:
+    # Dipendenza opzionale: serializzazione JSON in C (datetime supportato nativamente)
+    import orjson
+except ImportError:
+    orjson = None
+
 # Colori per output
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -37,33 +48,107 @@ CYAN = '\033[96m'
 RESET = '\033[0m'
 BOLD = '\033[1m'
 
+# Intestazioni fisse, costruite una sola volta all'import
+BANNER = (
+    f"\n{BLUE}{'='*70}{RESET}\n"
+    f"{BLUE}{BOLD}🚀 QKD_Mate Universal Installer 🚀{RESET}\n"
+    f"{BLUE}{'='*70}{RESET}"
+)
+COMPLETED_BANNER = (
+    f"\n{GREEN}{'='*70}{RESET}\n"
+    f"{GREEN}{BOLD}🎉 INSTALLAZIONE COMPLETATA! 🎉{RESET}\n"
+    f"{GREEN}{'='*70}{RESET}"
+)
+
+# Valori costanti per tutta l'installazione, letti una sola volta
+# (Path.home() può interrogare il database utenti o il registro di sistema)
+_HOME = Path.home()
+_PY_VER = sys.version.split()[0]
+
+# File generati o di sviluppo da non copiare nell'installazione
+# (il bytecode viene rigenerato al primo import)
+COPY_IGNORE = ("__pycache__", "*.pyc", "*.pyo", ".git", ".pytest_cache")
+
+def _copy_if_changed(source, dest):
+    """
+    Copia source in dest solo se dest manca o differisce per dimensione o mtime.
+    
+    Dato che shutil.copy2 preserva l'mtime, un file già installato e non
+    modificato non viene riletto né riscritto. Ritorna True se ha copiato.
+    """
+    src_stat = os.stat(source)
+    try:
+        dst_stat = os.stat(dest)
+    except FileNotFoundError:
+        pass
+    else:
+        if (dst_stat.st_size, dst_stat.st_mtime_ns) == (src_stat.st_size, src_stat.st_mtime_ns):
+            return False
+    # copyfile usa già da sé le copie nel kernel dove sono sicure
+    # (copy_file_range/sendfile su Linux, fcopyfile su macOS)
+    shutil.copy2(source, dest)
+    return True
+
+def _write_executable(path, content):
+    """Scrive un file eseguibile con permessi 0o755"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+    # Il mode di os.open vale solo per un file nuovo e passa dalla umask:
+    # fchmod sul descrittore già aperto forza 0o755 anche su un launcher
+    # rimasto da un'installazione precedente (senza un secondo lookup del path)
+    if hasattr(os, "fchmod"):
+        os.fchmod(fd, 0o755)
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+
+def _is_ignored(name):
+    """True se il file/directory non va installato (vedi COPY_IGNORE)"""
+    return any(fnmatch(name, pattern) for pattern in COPY_IGNORE)
+
+def _tree_copy_jobs(source, dest):
+    """
+    Crea in dest la struttura di directory di source e ritorna le coppie
+    (file sorgente, file destinazione) da copiare, una per file.
+    Directory e file in COPY_IGNORE non vengono né visitati né copiati.
+    """
+    jobs = []
+    for root, dirs, files in os.walk(source):
+        dirs[:] = [d for d in dirs if not _is_ignored(d)]
+        target = Path(dest) / os.path.relpath(root, source)
+        target.mkdir(parents=True, exist_ok=True)
+        jobs.extend((os.path.join(root, name), target / name)
+                    for name in files if not _is_ignored(name))
+    return jobs
+
 class UniversalInstaller:
     def __init__(self):
-        self.system = platform.system().lower()
+        # Informazioni di piattaforma lette una sola volta: su Windows
+        # platform.release() può lanciare un sottoprocesso ad ogni chiamata
+        uname = platform.uname()
+        self.platform_info = (uname.system, uname.release, uname.machine)
+        self.system = uname.system.lower()
         self.project_root = Path(__file__).parent.resolve()
         self.project_name = "QKD_Mate"
         
         # Percorsi di installazione per sistema
         self.install_paths = {
-            'windows': Path.home() / "AppData" / "Local" / self.project_name,
-            'linux': Path.home() / ".local" / "share" / self.project_name,
-            'darwin': Path.home() / "Applications" / self.project_name  # macOS
+            'windows': _HOME / "AppData" / "Local" / self.project_name,
+            'linux': _HOME / ".local" / "share" / self.project_name,
+            'darwin': _HOME / "Applications" / self.project_name  # macOS
         }
         
         self.install_path = self.install_paths.get(self.system, 
-                                                  Path.home() / self.project_name)
+                                                  _HOME / self.project_name)
         
         # File di configurazione installazione
         self.install_config = self.install_path / "install_info.json"
     
     def print_banner(self):
         """Stampa banner di installazione"""
-        print(f"\n{BLUE}{'='*70}{RESET}")
-        print(f"{BLUE}{BOLD}🚀 QKD_Mate Universal Installer 🚀{RESET}")
-        print(f"{BLUE}{'='*70}{RESET}")
-        print(f"{CYAN}Sistema rilevato: {platform.system()} {platform.release()}{RESET}")
-        print(f"{CYAN}Architettura: {platform.machine()}{RESET}")
-        print(f"{CYAN}Python: {sys.version.split()[0]}{RESET}")
+        print(BANNER)
+        system, release, machine = self.platform_info
+        print(f"{CYAN}Sistema rilevato: {system} {release}{RESET}")
+        print(f"{CYAN}Architettura: {machine}{RESET}")
+        print(f"{CYAN}Python: {_PY_VER}{RESET}")
         print(f"{CYAN}Percorso installazione: {self.install_path}{RESET}\n")
     
     def check_requirements(self):
@@ -72,23 +157,29 @@ class UniversalInstaller:
         
         # Controllo versione Python
         if sys.version_info < (3, 10):
-            print(f"{RED}❌ Python 3.10+ richiesto. Versione attuale: {sys.version.split()[0]}{RESET}")
+            print(f"{RED}❌ Python 3.10+ richiesto. Versione attuale: {_PY_VER}{RESET}")
             return False
         
-        print(f"{GREEN}✅ Python {sys.version.split()[0]} - OK{RESET}")
+        print(f"{GREEN}✅ Python {_PY_VER} - OK{RESET}")
         
         # Controllo pip
+        # Lettura dei metadati installati invece di avviare un interprete con "pip --version"
         try:
-            subprocess.run([sys.executable, "-m", "pip", "--version"], 
-                         check=True, capture_output=True)
+            metadata.version("pip")
             print(f"{GREEN}✅ pip disponibile{RESET}")
-        except subprocess.CalledProcessError:
+        except metadata.PackageNotFoundError:
             print(f"{RED}❌ pip non trovato{RESET}")
             return False
         
         # Controllo spazio disco (almeno 50MB)
         try:
-            free_space = shutil.disk_usage(Path.home()).free
+            if hasattr(os, "statvfs"):
+                # Unix: una sola chiamata statvfs, senza il wrapper di shutil
+                st = os.statvfs(_HOME)
+                free_space = st.f_bavail * st.f_frsize
+            else:
+                # Windows: shutil usa già direttamente GetDiskFreeSpaceExW
+                free_space = shutil.disk_usage(_HOME).free
             if free_space < 50 * 1024 * 1024:  # 50MB
                 print(f"{RED}❌ Spazio disco insufficiente{RESET}")
                 return False
@@ -120,38 +211,49 @@ class UniversalInstaller:
             "examples/"
         ]
         
+        # Le directory vengono appiattite in singoli file: ogni copia è un
+        # task indipendente, eseguito in parallelo (I/O che rilascia il GIL).
+        # Le directory esistenti sono aggiornate sul posto: i file invariati
+        # di un'installazione precedente non vengono ricopiati
         copied_files = []
+        copy_jobs = []
         for item in files_to_copy:
             source = self.project_root / item
             if source.exists():
                 dest = self.install_path / item
                 
                 if source.is_dir():
-                    if dest.exists():
-                        shutil.rmtree(dest)
-                    shutil.copytree(source, dest)
-                    print(f"{GREEN}✅ Copiata directory: {item}{RESET}")
+                    copy_jobs.extend(_tree_copy_jobs(source, dest))
                 else:
                     dest.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(source, dest)
-                    print(f"{GREEN}✅ Copiato file: {item}{RESET}")
+                    copy_jobs.append((source, dest))
                 
                 copied_files.append(item)
         
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            futures = [executor.submit(_copy_if_changed, src, dst) for src, dst in copy_jobs]
+            # result() propaga eventuali errori di copia
+            changed = sum(future.result() for future in as_completed(futures))
+        
+        # Riepilogo della fase di copia scritto con una sola operazione sul terminale
+        summary = [
+            f"{GREEN}✅ Copiata directory: {item}{RESET}" if item.endswith("/")
+            else f"{GREEN}✅ Copiato file: {item}{RESET}"
+            for item in copied_files
+        ]
+        summary.append(f"{GREEN}✅ {changed} file copiati, {len(copy_jobs) - changed} già aggiornati{RESET}")
+        sys.stdout.write("\n".join(summary) + "\n")
+        
         # Crea directory certs
         certs_dir = self.install_path / "certs"
         certs_dir.mkdir(exist_ok=True)
         print(f"{GREEN}✅ Directory certificati creata{RESET}")
         
-        # Installa dipendenze Python
-        print(f"\n{BLUE}📚 Installazione dipendenze Python...{RESET}")
-        try:
-            cmd = [sys.executable, "-m", "pip", "install", "-r", 
-                   str(self.install_path / "requirements.txt")]
-            subprocess.run(cmd, check=True, capture_output=True)
-            print(f"{GREEN}✅ Dipendenze installate{RESET}")
-        except subprocess.CalledProcessError as e:
-            print(f"{RED}❌ Errore installazione dipendenze: {e}{RESET}")
+        # Installa dipendenze Python (saltato se requirements.txt e interprete non sono cambiati)
+        requirements_hash = self.requirements_hash()
+        if requirements_hash == self.load_install_info().get("requirements_hash"):
+            print(f"\n{GREEN}✅ Dipendenze già installate (requirements.txt e interprete invariati){RESET}")
+        elif not self.install_dependencies():
             return False
         
         # Configurazione iniziale se non in modalità silent
@@ -166,20 +268,73 @@ class UniversalInstaller:
         
         # Salva informazioni installazione
         install_info = {
-            "install_date": str(datetime.now()),
+            "install_date": datetime.now(),
             "install_path": str(self.install_path),
             "version": "1.0.0",
-            "system": platform.system(),
-            "python_version": sys.version.split()[0],
+            "system": self.platform_info[0],
+            "python_version": _PY_VER,
+            "requirements_hash": requirements_hash,
             "files": copied_files
         }
         
-        with open(self.install_config, "w") as f:
-            json.dump(install_info, f, indent=2)
+        if orjson is not None:
+            self.install_config.write_bytes(orjson.dumps(install_info, option=orjson.OPT_INDENT_2))
+        else:
+            # Stesso formato ISO 8601 prodotto da orjson per install_date
+            with open(self.install_config, "w") as f:
+                json.dump(install_info, f, indent=2, default=datetime.isoformat)
         
         print(f"\n{GREEN}🎉 Installazione completata con successo!{RESET}")
         return True
     
+    def requirements_hash(self):
+        """
+        SHA-256 di requirements.txt e dell'interprete che esegue l'installazione.
+        
+        Serve a riconoscere reinstallazioni senza modifiche: con un altro
+        interprete o virtualenv (sys.executable o versione diversi) le
+        dipendenze vanno installate anche se requirements.txt è invariato.
+        """
+        digest = hashlib.sha256((self.install_path / "requirements.txt").read_bytes())
+        digest.update(f"\0{sys.executable}\0{_PY_VER}".encode())
+        return digest.hexdigest()
+    
+    def load_install_info(self):
+        """Legge install_info.json di un'installazione precedente (dizionario vuoto se assente)"""
+        try:
+            with open(self.install_config) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def install_dependencies(self):
+        """
+        Installa le dipendenze Python con pip mostrando l'output man mano.
+        
+        La cache dei wheel resta in install_path/.pip-cache tra un'installazione
+        e l'altra; --no-compile rimanda la generazione dei .pyc al primo import.
+        """
+        print(f"\n{BLUE}📚 Installazione dipendenze Python...{RESET}")
+        cmd = [sys.executable, "-m", "pip", "install",
+               "--cache-dir", str(self.install_path / ".pip-cache"),
+               "--prefer-binary", "--no-compile", "--disable-pip-version-check",
+               "-r", str(self.install_path / "requirements.txt")]
+        try:
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  text=True) as proc:
+                for line in proc.stdout:
+                    print(f"   {line.rstrip()}")
+        except OSError as e:
+            print(f"{RED}❌ Errore installazione dipendenze: {e}{RESET}")
+            return False
+        
+        if proc.returncode != 0:
+            print(f"{RED}❌ Errore installazione dipendenze: pip terminato con codice {proc.returncode}{RESET}")
+            return False
+        
+        print(f"{GREEN}✅ Dipendenze installate{RESET}")
+        return True
+    
     def interactive_initial_setup(self):
         """Setup iniziale interattivo"""
         print(f"\n{BLUE}⚙️  Configurazione iniziale...{RESET}")
@@ -251,9 +406,7 @@ cd "{self.install_path}"
 python3 qkd_node_manager.py "$@"
 """
         script_path = self.install_path / "qkd_mate"
-        with open(script_path, "w") as f:
-            f.write(script_content)
-        script_path.chmod(0o755)
+        _write_executable(script_path, script_content)
         print(f"{GREEN}✅ Script Unix creato: qkd_mate{RESET}")
         
         # Crea anche un .desktop file per Linux
@@ -272,13 +425,11 @@ Terminal=true
 Type=Application
 Categories=Network;Security;
 """
-        desktop_dir = Path.home() / ".local" / "share" / "applications"
+        desktop_dir = _HOME / ".local" / "share" / "applications"
         desktop_dir.mkdir(parents=True, exist_ok=True)
         
         desktop_path = desktop_dir / "qkd-mate.desktop"
-        with open(desktop_path, "w") as f:
-            f.write(desktop_content)
-        desktop_path.chmod(0o755)
+        _write_executable(desktop_path, desktop_content)
         print(f"{GREEN}✅ File .desktop creato{RESET}")
     
     def create_desktop_shortcut(self):
@@ -317,11 +468,11 @@ Categories=Network;Security;
     
     def create_linux_shortcut(self):
         """Crea shortcut Linux"""
-        desktop_path = Path.home() / "Desktop" / "QKD Mate.desktop"
-        if Path.home().joinpath("Desktop").exists():
+        desktop_path = _HOME / "Desktop" / "QKD Mate.desktop"
+        if (_HOME / "Desktop").exists():
             try:
                 shutil.copy2(
-                    Path.home() / ".local" / "share" / "applications" / "qkd-mate.desktop",
+                    _HOME / ".local" / "share" / "applications" / "qkd-mate.desktop",
                     desktop_path
                 )
                 desktop_path.chmod(0o755)
@@ -372,13 +523,13 @@ Categories=Network;Security;
         
         if self.system == "windows":
             shortcuts_to_remove.extend([
-                Path.home() / "Desktop" / "QKD Mate.lnk",
-                Path.home() / "AppData" / "Roaming" / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "QKD Mate.lnk"
+                _HOME / "Desktop" / "QKD Mate.lnk",
+                _HOME / "AppData" / "Roaming" / "Microsoft" / "Windows" / "Start Menu" / "Programs" / "QKD Mate.lnk"
             ])
         elif self.system == "linux":
             shortcuts_to_remove.extend([
-                Path.home() / "Desktop" / "QKD Mate.desktop",
-                Path.home() / ".local" / "share" / "applications" / "qkd-mate.desktop"
+                _HOME / "Desktop" / "QKD Mate.desktop",
+                _HOME / ".local" / "share" / "applications" / "qkd-mate.desktop"
             ])
         
         for shortcut in shortcuts_to_remove:
@@ -391,9 +542,7 @@ Categories=Network;Security;
     
     def show_post_install_info(self):
         """Mostra informazioni post-installazione"""
-        print(f"\n{GREEN}{'='*70}{RESET}")
-        print(f"{GREEN}{BOLD}🎉 INSTALLAZIONE COMPLETATA! 🎉{RESET}")
-        print(f"{GREEN}{'='*70}{RESET}")
+        print(COMPLETED_BANNER)
         
         print(f"\n{CYAN}📍 Percorso installazione:{RESET}")
         print(f"   {self.install_path}")
@@ -418,8 +567,6 @@ Categories=Network;Security;
         print(f"   • Disinstallazione: python install.py --uninstall")
 
 def main():
-    from datetime import datetime
-    
     installer = UniversalInstaller()
     
     # Parsing argomenti
@@ -37,8 +37,19 @@ CONFORMITÀ ETSI GS QKD 014:
 # Import delle librerie standard
 import sys          # Gestione argomenti comando e uscite
 import time         # Gestione temporizzazioni e sleep
-import os           # Operazioni filesystem e comandi sistema
+import math         # Arrotondamento countdown monitoraggio
+import os           # Operazioni filesystem
+import ssl          # Classificazione errori TLS
+import json         # Output machine-readable (--json)
+import argparse     # Parsing riga di comando
+import contextlib   # Redirect dell'output decorato in modalità --json
+import itertools    # Lettura parziale di node_config.yaml
+import socket       # Test porta 443 senza processi esterni
 from datetime import datetime  # Timestamp per logging e diagnostica
+from importlib.util import find_spec  # Verifica presenza PyYAML senza importarlo
+
+import requests     # Classificazione errori di rete del client QKD
+from src.utils import QKDClientError
 
 # ===============================================================
 # CONFIGURAZIONE PRINCIPALE - MODIFICA QUESTA SEZIONE SE NECESSARIO
@@ -46,28 +57,64 @@ from datetime import datetime  # Timestamp per logging e diagnostica
 # Tipo di nodo da gestire: "alice" (master) o "bob" (slave)
 # Questa configurazione viene sovrascritta da node_config.yaml se presente
 NODE_TYPE = "alice"  # Cambia in "bob" per gestire il nodo Bob
+# Intervallo minimo (secondi) tra due controlli in modalità monitor
+MIN_MONITOR_INTERVAL = 1
+# Secondi entro cui i certificati del client non vengono ricontrollati su disco
+CERT_RECHECK_SEC = 5
 # ===============================================================
 
 # Carica configurazione da file YAML se presente
-try:
+NODE_CONFIG_HEAD_LINES = 32  # Righe di node_config.yaml analizzate per cercare node_type
+
+def _load_node_type(path="node_config.yaml"):
+    """
+    Legge node_type da node_config.yaml analizzando solo l'inizio del file.
+    
+    Vengono parsate le prime NODE_CONFIG_HEAD_LINES righe; il resto del
+    file è letto e parsato solo se node_type non compare nell'intestazione
+    (o se il taglio cade a metà di una struttura YAML).
+    Ritorna None se la chiave non è presente.
+    """
     import yaml
-    if os.path.exists("node_config.yaml"):
-        with open("node_config.yaml", "r") as f:
-            config = yaml.safe_load(f)
-            if config and "node_type" in config:
-                NODE_TYPE = config["node_type"]
-                print(f"Configurazione caricata da node_config.yaml: NODE_TYPE = {NODE_TYPE}")
-except ImportError:
-    pass  # YAML non installato, usa configurazione inline
+    
+    # Loader sicuro in C (libyaml) se disponibile, equivalente a safe_load
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r") as f:
+        head = "".join(itertools.islice(f, NODE_CONFIG_HEAD_LINES))
+        try:
+            config = yaml.load(head, Loader=loader)
+            truncated = False
+        except yaml.YAMLError:
+            config, truncated = None, True  # Taglio a metà di una struttura
+        if isinstance(config, dict) and "node_type" in config:
+            return config["node_type"]
+        rest = f.read()
+    
+    if rest or truncated:
+        # Parsing completo (solleva l'errore se il file è davvero malformato)
+        config = yaml.load(head + rest, Loader=loader)
+    return config.get("node_type") if isinstance(config, dict) else None
+
+# find_spec verifica che PyYAML sia installato senza importarlo: il modulo
+# viene caricato solo se node_config.yaml esiste (altrimenti configurazione inline)
+if os.path.exists("node_config.yaml") and find_spec("yaml") is not None:
+    node_type = _load_node_type()
+    if node_type is not None:
+        NODE_TYPE = node_type
+        print(f"Configurazione caricata da node_config.yaml: NODE_TYPE = {NODE_TYPE}",
+              file=sys.stderr)
 
-# Importa il client corretto basato sulla configurazione
+# Importa il client corretto basato sulla configurazione. Il manager gestisce
+# da sé il ciclo di vita del client (lo chiude e lo ricrea quando i certificati
+# cambiano), quindi usa le factory che creano sempre un client nuovo e non
+# quelle memoizzate, che restituirebbero l'istanza già chiusa
 if NODE_TYPE.lower() == "alice":
-    from src.alice_client import alice_client as qkd_client
+    from src.alice_client import alice_client_new as qkd_client
     NODE_NAME = "ALICE"
     NODE_IP = "78.40.171.143"
     CERT_PREFIX = "client_Alice2"
 elif NODE_TYPE.lower() == "bob":
-    from src.bob_client import bob_client as qkd_client
+    from src.bob_client import bob_client_new as qkd_client
     NODE_NAME = "BOB"
     NODE_IP = "78.40.171.144"
     CERT_PREFIX = "client_Bob2"
@@ -75,34 +122,89 @@ else:
     print(f"ERRORE: NODE_TYPE '{NODE_TYPE}' non valido. Usa 'alice' o 'bob'")
     sys.exit(1)
 
-# Colori per output
-GREEN = '\033[92m'
-RED = '\033[91m'
-YELLOW = '\033[93m'
-BLUE = '\033[94m'
-RESET = '\033[0m'
+# Colori per output: disattivati se stdout non è un terminale (log, pipe)
+# o se è impostata la variabile d'ambiente NO_COLOR (https://no-color.org)
+_USE_COLOR = sys.stdout.isatty() and not os.environ.get("NO_COLOR")
+GREEN = '\033[92m' if _USE_COLOR else ''
+RED = '\033[91m' if _USE_COLOR else ''
+YELLOW = '\033[93m' if _USE_COLOR else ''
+BLUE = '\033[94m' if _USE_COLOR else ''
+RESET = '\033[0m' if _USE_COLOR else ''
+
+# Testi fissi dell'interfaccia, costruiti una sola volta all'import
+_BORDER = "=" * 60
+BANNER = (
+    f"{BLUE}╔{'═'*60}╗{RESET}\n"
+    f"{BLUE}║{RESET} Gestore Nodo Quantistico QKD - {NODE_NAME:^30} {BLUE}║{RESET}\n"
+    f"{BLUE}╚{'═'*60}╝{RESET}\n"
+)
+MENU = (
+    "\n" + _BORDER + "\n"
+    f"MENU PRINCIPALE - Nodo {NODE_NAME}\n"
+    + _BORDER + "\n"
+    "1. Verifica stato nodo\n"
+    "2. Monitoraggio continuo\n"
+    "3. Richiedi chiavi quantistiche\n"
+    "4. Diagnostica completa\n"
+    "5. Esci\n"
+    + _BORDER
+)
+# Suggerimenti mostrati da check_status in base al tipo di errore
+SSL_HINT = (
+    f"\n{YELLOW}Suggerimento:{RESET}\n"
+    "  - Verifica che i certificati siano validi\n"
+    "  - Controlla la data/ora del sistema\n"
+    "  - Verifica che il server riconosca il tuo certificato client"
+)
+NETWORK_HINT = (
+    f"\n{YELLOW}Suggerimento:{RESET}\n"
+    "  - Verifica la connessione di rete\n"
+    "  - Controlla il firewall\n"
+    "  - Verifica che l'IP {ip}:443 sia raggiungibile\n"
+    "  - Prova: ping {ip}"
+)
+STATS_LINE = "\nStatistiche: Uptime: {:.1f}% ({}/{})"
+STATS_EVERY = 10  # Controlli tra due stampe delle statistiche (se lo stato non cambia)
+COUNTDOWN = "\rProssimo controllo tra {} secondi..."
+CLEAR_LINE = "\r\033[K"  # Ritorno a capo + cancella fino a fine riga (ANSI EL)
 
 class QKDNodeManager:
-    def __init__(self):
+    # Certificati già verificati in questo processo: la verifica non dipende
+    # dall'istanza, quindi più manager condividono lo stesso esito
+    _certs_checked = False
+    
+    def __init__(self, check_certs=True):
         self.node_name = NODE_NAME
         self.node_ip = NODE_IP
         self.cert_prefix = CERT_PREFIX
+        self._client = None  # Client QKD creato al primo uso e poi riutilizzato
+        self._client_cert_sig = None  # (mtime, size) dei certificati usati dal client
+        self._cert_checked_at = 0.0  # Istante (monotonic) dell'ultimo controllo dei certificati
         print(f"{BLUE}Inizializzazione gestore per nodo {self.node_name}{RESET}")
-        self.check_certificates()
+        if check_certs and not QKDNodeManager._certs_checked:
+            self.check_certificates()
         
-    def check_certificates(self):
-        """Verifica che i certificati necessari siano presenti"""
+    def scan_certificates(self):
+        """Certificati del nodo in certs/: (voci presenti per nome, nomi mancanti)"""
         ca_cert = f"ca_{self.node_name.lower()}.crt"
         required_certs = [
             ca_cert, 
             f"{self.cert_prefix}.crt", 
             f"{self.cert_prefix}.key"
         ]
-        missing = []
         
-        for cert in required_certs:
-            if not os.path.exists(f"certs/{cert}"):
-                missing.append(cert)
+        # Una sola scansione della directory invece di un exists() per file
+        try:
+            with os.scandir("certs") as it:
+                present = {entry.name: entry for entry in it if entry.is_file()}
+        except FileNotFoundError:
+            present = {}
+        missing = [cert for cert in required_certs if cert not in present]
+        return present, missing
+    
+    def check_certificates(self):
+        """Verifica che i certificati necessari siano presenti (esce se mancano)"""
+        present, missing = self.scan_certificates()
         
         if missing:
             print(f"{RED}ERRORE: Certificati mancanti per {self.node_name}:{RESET}")
@@ -111,49 +213,78 @@ class QKDNodeManager:
             print("\nCopia i certificati nella cartella certs/ e riprova.")
             sys.exit(1)
         
+        QKDNodeManager._certs_checked = True
+        
         # Verifica permessi chiave privata
         key_path = f"certs/{self.cert_prefix}.key"
-        if os.path.exists(key_path):
-            stat_info = os.stat(key_path)
-            if stat_info.st_mode & 0o077:
-                print(f"{YELLOW}AVVISO: La chiave privata ha permessi troppo aperti.{RESET}")
-                print(f"Esegui: chmod 600 {key_path}")
+        stat_info = present[f"{self.cert_prefix}.key"].stat()
+        if stat_info.st_mode & 0o077:
+            print(f"{YELLOW}AVVISO: La chiave privata ha permessi troppo aperti.{RESET}")
+            print(f"Esegui: chmod 600 {key_path}")
+    
+    @staticmethod
+    def _cert_signature(client):
+        """Firma (mtime, size) dei file cert/key/CA usati da un client"""
+        signature = []
+        for path in (*client.cert, client.verify):
+            try:
+                stat_info = os.stat(path)
+                signature.append((stat_info.st_mtime_ns, stat_info.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    @property
+    def client(self):
+        """Client QKD condiviso: sessione mTLS creata una sola volta e riusata.
+        
+        Il client viene ricreato solo se i certificati su disco cambiano
+        (mtime o dimensione diversi), così la catena caricata nella sessione
+        resta valida tra un controllo e l'altro senza essere riletta.
+        I file vengono ricontrollati al massimo ogni CERT_RECHECK_SEC secondi.
+        """
+        now = time.monotonic()
+        if self._client is not None and now - self._cert_checked_at >= CERT_RECHECK_SEC:
+            self._cert_checked_at = now
+            if self._cert_signature(self._client) != self._client_cert_sig:
+                self._client.close()
+                self._client = None
+        if self._client is None:
+            self._client = qkd_client()
+            self._client_cert_sig = self._cert_signature(self._client)
+            self._cert_checked_at = now
+        return self._client
     
     def check_status(self):
         """Controlla lo stato del nodo"""
         try:
             print(f"{BLUE}Controllo stato nodo {self.node_name}...{RESET}")
-            start_time = time.time()
+            # Orologio monotono ad alta risoluzione, millisecondi in aritmetica intera
+            start_ns = time.perf_counter_ns()
             
-            client = qkd_client()
-            response = client.get("status")
+            response = self.client.get("status")
             
-            elapsed = time.time() - start_time
+            elapsed_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
-            print(f"{GREEN}✓ Nodo {self.node_name} ATTIVO{RESET}")
-            print(f"  IP: {self.node_ip}:443")
-            print(f"  Tempo risposta: {elapsed:.2f}s")
-            print(f"  Risposta: {response}")
+            print(f"{GREEN}✓ Nodo {self.node_name} ATTIVO{RESET}\n"
+                  f"  IP: {self.node_ip}:443\n"
+                  f"  Tempo risposta: {elapsed_ms} ms\n"
+                  f"  Risposta: {json.dumps(response, default=str)}")
             
             return True, response
             
         except Exception as e:
-            print(f"{RED}✗ Nodo {self.node_name} NON ATTIVO{RESET}")
-            print(f"  IP: {self.node_ip}:443")
-            print(f"  Errore: {str(e)}")
+            print(f"{RED}✗ Nodo {self.node_name} NON ATTIVO{RESET}\n"
+                  f"  IP: {self.node_ip}:443\n"
+                  f"  Errore: {e}")
             
             # Suggerimenti basati sull'errore
-            if "certificate" in str(e).lower():
-                print(f"\n{YELLOW}Suggerimento:{RESET}")
-                print("  - Verifica che i certificati siano validi")
-                print("  - Controlla la data/ora del sistema")
-                print("  - Verifica che il server riconosca il tuo certificato client")
-            elif "connection" in str(e).lower():
-                print(f"\n{YELLOW}Suggerimento:{RESET}")
-                print("  - Verifica la connessione di rete")
-                print("  - Controlla il firewall")
-                print(f"  - Verifica che l'IP {self.node_ip}:443 sia raggiungibile")
-                print(f"  - Prova: ping {self.node_ip}")
+            # (requests.exceptions.SSLError è sottoclasse di ConnectionError:
+            # va controllata per prima)
+            if isinstance(e, (requests.exceptions.SSLError, ssl.SSLError)):
+                print(SSL_HINT)
+            elif isinstance(e, (requests.exceptions.ConnectionError, ConnectionError)):
+                print(NETWORK_HINT.format(ip=self.node_ip))
                 
             return False, None
     
@@ -162,41 +293,63 @@ class QKDNodeManager:
         try:
             print(f"\n{BLUE}Richiesta {count} chiavi da {self.node_name}...{RESET}")
             
-            client = qkd_client()
-            response = client.post("keys", {"count": count})
+            response = self.client.post("keys", {"count": count})
             
-            print(f"{GREEN}✓ Chiavi ricevute con successo{RESET}")
-            print(f"  Risposta: {response}")
+            print(f"{GREEN}✓ Chiavi ricevute con successo{RESET}\n"
+                  f"  Risposta: {json.dumps(response, default=str)}")
             
             return True, response
             
         except Exception as e:
-            print(f"{RED}✗ Errore nella richiesta chiavi{RESET}")
-            print(f"  Errore: {str(e)}")
+            print(f"{RED}✗ Errore nella richiesta chiavi{RESET}\n"
+                  f"  Errore: {e}")
             return False, None
     
-    def continuous_monitor(self, interval=30):
-        """Monitoraggio continuo del nodo"""
-        print(f"{BLUE}=== Monitoraggio continuo nodo {self.node_name} ==={RESET}")
-        print(f"IP monitorato: {self.node_ip}:443")
-        print(f"Intervallo controlli: {interval} secondi")
-        print(f"{YELLOW}Premi Ctrl+C per terminare{RESET}\n")
+    def continuous_monitor(self, interval=30, max_interval=None, ui_refresh=1.0):
+        """Monitoraggio continuo del nodo
+        
+        Dopo un fallimento l'intervallo raddoppia ad ogni controllo fallito
+        (fino a max_interval, default 5x interval) per non sovraccaricare
+        un nodo offline; torna a interval al primo controllo riuscito.
+        
+        interval regola solo la frequenza dei controlli verso il KME;
+        ui_refresh (secondi) quella di aggiornamento del countdown a schermo.
+        """
+        if max_interval is None:
+            max_interval = interval * 5
+        if interval < MIN_MONITOR_INTERVAL or max_interval < interval:
+            print(f"{RED}Intervallo non valido: minimo {MIN_MONITOR_INTERVAL}s "
+                  f"e max_interval >= interval{RESET}")
+            return
+        if ui_refresh <= 0:
+            print(f"{RED}Intervallo di aggiornamento schermo non valido: deve essere > 0{RESET}")
+            return
+        
+        print(f"{BLUE}=== Monitoraggio continuo nodo {self.node_name} ==={RESET}\n"
+              f"IP monitorato: {self.node_ip}:443\n"
+              f"Intervallo controlli: {interval} secondi (max {max_interval} in caso di errori)\n"
+              f"{YELLOW}Premi Ctrl+C per terminare{RESET}\n")
         
         check_count = 0
-        failures = 0
+        success_count = 0
         consecutive_failures = 0
+        countdown = sys.stdout.isatty()  # Countdown animato solo su terminale
         
         try:
             while True:
                 check_count += 1
+                cycle_start = time.monotonic()
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 
                 print(f"\n[{timestamp}] Controllo #{check_count}")
                 
                 success, _ = self.check_status()
                 
+                # Le statistiche si stampano al primo controllo, ogni
+                # STATS_EVERY controlli e ad ogni cambio di stato del nodo
+                state_changed = success != (consecutive_failures == 0)
+                
                 if not success:
-                    failures += 1
                     consecutive_failures += 1
                     print(f"{RED}Fallimenti consecutivi: {consecutive_failures}{RESET}")
                     
@@ -206,28 +359,70 @@ class QKDNodeManager:
                     # Log per troubleshooting dopo 5 fallimenti
                     if consecutive_failures == 5:
                         print(f"\n{YELLOW}=== Diagnostica avanzata ==={RESET}")
-                        os.system(f"ping -c 2 {self.node_ip} 2>&1 | grep -E 'bytes from|Destination'")
+                        _, output = self._ping()
+                        for line in output.splitlines():
+                            if "bytes from" in line or "Destination" in line:
+                                print(line)
+                        state = "aperta" if self._port_open() else "non raggiungibile"
+                        print(f"Porta 443: {state}")
                         print(f"{YELLOW}=========================={RESET}\n")
                 else:
+                    success_count += 1
                     if consecutive_failures > 0:
                         print(f"{GREEN}Il nodo è tornato online dopo {consecutive_failures} fallimenti{RESET}")
                     consecutive_failures = 0
                 
                 # Statistiche
-                uptime = ((check_count - failures) / check_count) * 100
-                print(f"\nStatistiche: Uptime: {uptime:.1f}% ({check_count - failures}/{check_count})")
+                if state_changed or check_count == 1 or check_count % STATS_EVERY == 0:
+                    print(STATS_LINE.format(success_count * 100 / check_count, success_count, check_count))
                 
-                # Attendi prima del prossimo controllo
-                for i in range(interval):
-                    print(f"\rProssimo controllo tra {interval - i} secondi...", end='', flush=True)
-                    time.sleep(1)
-                print("\r" + " " * 50 + "\r", end='', flush=True)  # Pulisce la linea
+                # Attendi prima del prossimo controllo (backoff esponenziale se offline)
+                wait = interval
+                if consecutive_failures > 0:
+                    wait = min(interval * 2 ** min(consecutive_failures, 4), max_interval)
+                # La scadenza è calcolata dall'inizio del ciclo, così la durata
+                # del controllo non si somma all'intervallo (niente deriva)
+                deadline = cycle_start + wait
+                if countdown:
+                    # Il terminale viene riscritto solo quando cambiano i secondi mostrati
+                    shown = None
+                    while (remaining := deadline - time.monotonic()) > 0:
+                        seconds = math.ceil(remaining)
+                        if seconds != shown:
+                            sys.stdout.write(COUNTDOWN.format(seconds))
+                            sys.stdout.flush()
+                            shown = seconds
+                        time.sleep(min(ui_refresh, remaining))
+                    sys.stdout.write(CLEAR_LINE)  # Pulisce la linea
+                    sys.stdout.flush()
+                else:
+                    # Output rediretto (log, servizio): nessun countdown, una sola attesa
+                    time.sleep(max(0, deadline - time.monotonic()))
                 
         except KeyboardInterrupt:
             print(f"\n\n{YELLOW}Monitoraggio interrotto.{RESET}")
             print(f"Totale controlli: {check_count}")
-            print(f"Uptime finale: {((check_count - failures) / check_count) * 100:.1f}%")
+            if check_count:
+                print(f"Uptime finale: {success_count * 100 / check_count:.1f}%")
 
+    def _ping(self, count=2, timeout=2):
+        """Ping del nodo senza shell: ritorna (riuscito, output del comando)"""
+        import subprocess  # Usato solo dalla diagnostica
+        try:
+            result = subprocess.run(
+                ["ping", "-c", str(count), "-W", str(timeout), self.node_ip],
+                capture_output=True, text=True, timeout=count * timeout + 2
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False, ""  # ping non disponibile o bloccato
+        return result.returncode == 0, result.stdout + result.stderr
+    
+    def _port_open(self, port=443, timeout=2):
+        """Verifica con una connessione TCP diretta che la porta del KME sia aperta"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            return sock.connect_ex((self.node_ip, port)) == 0
+    
     def run_diagnostic(self):
         """Esegue una diagnostica completa del nodo"""
         print(f"\n{BLUE}=== DIAGNOSTICA NODO {self.node_name} ==={RESET}")
@@ -236,37 +431,32 @@ class QKDNodeManager:
         print(f"IP target: {self.node_ip}:443")
         print("-" * 50)
         
-        # 1. Verifica certificati
-        print(f"\n{BLUE}1. Verifica certificati:{RESET}")
-        ca_cert = f"ca_{self.node_name.lower()}.crt"
-        cert_files = [ca_cert, f"{self.cert_prefix}.crt", f"{self.cert_prefix}.key"]
-        all_certs_ok = True
-        for cert in cert_files:
-            path = f"certs/{cert}"
-            if os.path.exists(path):
-                size = os.path.getsize(path)
-                print(f"  {GREEN}✓{RESET} {cert} (dimensione: {size} bytes)")
-            else:
-                print(f"  {RED}✗{RESET} {cert} MANCANTE")
-                all_certs_ok = False
+        # Ping e test della porta sono indipendenti e limitati dai propri
+        # timeout: partono subito in parallelo, mentre si verificano i
+        # certificati. I risultati vengono stampati nell'ordine consueto.
+        from concurrent.futures import ThreadPoolExecutor  # Usato solo dalla diagnostica
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ping_future = executor.submit(self._ping)
+            port_future = executor.submit(self._port_open)
+            all_certs_ok = self._diagnose_certificates()
+            ping_ok, _ = ping_future.result()
+            port_ok = port_future.result()
         
         # 2. Test connettività di rete
         print(f"\n{BLUE}2. Test connettività di rete:{RESET}")
-        ping_result = os.system(f"ping -c 2 -W 2 {self.node_ip} > /dev/null 2>&1")
-        if ping_result == 0:
+        if ping_ok:
             print(f"  {GREEN}✓{RESET} Ping a {self.node_ip} riuscito")
         else:
             print(f"  {RED}✗{RESET} Ping a {self.node_ip} fallito")
         
         # 3. Test porta 443
         print(f"\n{BLUE}3. Test porta 443:{RESET}")
-        nc_result = os.system(f"nc -zv -w 2 {self.node_ip} 443 > /dev/null 2>&1")
-        if nc_result == 0:
+        if port_ok:
             print(f"  {GREEN}✓{RESET} Porta 443 aperta su {self.node_ip}")
         else:
             print(f"  {RED}✗{RESET} Porta 443 non raggiungibile su {self.node_ip}")
         
-        # 4. Test API
+        # 4. Test API (dipende dai certificati, quindi dopo le altre verifiche)
         print(f"\n{BLUE}4. Test connessione API:{RESET}")
         if all_certs_ok:
             success, response = self.check_status()
@@ -278,79 +468,133 @@ class QKDNodeManager:
             print(f"  {YELLOW}⚠{RESET} Test saltato (certificati mancanti)")
         
         print("\n" + "=" * 50)
+    
+    def _diagnose_certificates(self):
+        """Passo 1 della diagnostica: stampa lo stato dei certificati, True se tutti presenti"""
+        print(f"\n{BLUE}1. Verifica certificati:{RESET}")
+        ca_cert = f"ca_{self.node_name.lower()}.crt"
+        cert_files = [ca_cert, f"{self.cert_prefix}.crt", f"{self.cert_prefix}.key"]
+        all_certs_ok = True
+        try:
+            with os.scandir("certs") as it:
+                present = {entry.name: entry for entry in it if entry.is_file()}
+        except FileNotFoundError:
+            present = {}
+        for cert in cert_files:
+            if cert in present:
+                size = present[cert].stat().st_size
+                print(f"  {GREEN}✓{RESET} {cert} (dimensione: {size} bytes)")
+            else:
+                print(f"  {RED}✗{RESET} {cert} MANCANTE")
+                all_certs_ok = False
+        return all_certs_ok
 
-def main():
-    print(f"{BLUE}╔{'═'*60}╗{RESET}")
-    print(f"{BLUE}║{RESET} Gestore Nodo Quantistico QKD - {NODE_NAME:^30} {BLUE}║{RESET}")
-    print(f"{BLUE}╚{'═'*60}╝{RESET}\n")
+def build_parser():
+    """Parser della riga di comando (senza sottocomando: menu interattivo)"""
+    parser = argparse.ArgumentParser(
+        description=f"Gestore Nodo Quantistico QKD - {NODE_NAME}"
+    )
+    subparsers = parser.add_subparsers(dest="command")
     
-    manager = QKDNodeManager()
+    # --json: su stdout solo il risultato JSON, messaggi diagnostici su stderr
+    json_option = argparse.ArgumentParser(add_help=False)
+    json_option.add_argument("--json", action="store_true",
+                             help="Stampa solo il risultato in formato JSON")
     
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+    subparsers.add_parser("status", parents=[json_option], help="Controlla stato")
+    monitor = subparsers.add_parser("monitor", help="Monitoraggio continuo")
+    monitor.add_argument("interval", nargs="?", type=int, default=30,
+                         help="Intervallo controlli in secondi (default 30)")
+    monitor.add_argument("--ui-refresh", type=float, default=1.0,
+                         help="Aggiornamento del countdown in secondi, "
+                              "indipendente dai controlli (default 1)")
+    keys = subparsers.add_parser("keys", parents=[json_option], help="Richiedi chiavi")
+    keys.add_argument("count", nargs="?", type=int, default=1,
+                      help="Numero di chiavi da richiedere (default 1)")
+    subparsers.add_parser("diagnostic", help="Diagnostica completa")
+    return parser
+
+def _parse_int(text, default):
+    """Converte l'input numerico dell'utente; vuoto o non valido -> default"""
+    try:
+        return int(text)
+    except ValueError:
+        return default
+
+def interactive_menu(manager):
+    """Modalità interattiva a menu"""
+    while True:
+        print(MENU)
         
-        if command == "status":
+        choice = input("\nSeleziona opzione (1-5): ")
+        
+        if choice == "1":
             manager.check_status()
+            input("\nPremi INVIO per continuare...")
             
-        elif command == "monitor":
-            interval = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+        elif choice == "2":
+            interval = input("Intervallo controlli in secondi (default 30): ")
+            interval = _parse_int(interval, 30)
             manager.continuous_monitor(interval)
             
-        elif command == "keys":
-            count = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+        elif choice == "3":
+            count = input("Numero di chiavi da richiedere (default 1): ")
+            count = _parse_int(count, 1)
             manager.get_keys(count)
+            input("\nPremi INVIO per continuare...")
             
-        elif command == "diagnostic":
+        elif choice == "4":
             manager.run_diagnostic()
+            input("\nPremi INVIO per continuare...")
             
-        else:
-            print(f"{RED}Comando non riconosciuto: {command}{RESET}")
-            print("\nUso:")
-            print(f"  python {sys.argv[0]} status              # Controlla stato")
-            print(f"  python {sys.argv[0]} monitor [intervallo] # Monitoraggio continuo")
-            print(f"  python {sys.argv[0]} keys [numero]        # Richiedi chiavi")
-            print(f"  python {sys.argv[0]} diagnostic           # Diagnostica completa")
+        elif choice == "5":
+            print(f"\n{YELLOW}Uscita dal gestore nodo {NODE_NAME}.{RESET}")
+            break
             
-    else:
-        # Modalità interattiva
-        while True:
-            print("\n" + "="*60)
-            print(f"MENU PRINCIPALE - Nodo {NODE_NAME}")
-            print("="*60)
-            print("1. Verifica stato nodo")
-            print("2. Monitoraggio continuo")
-            print("3. Richiedi chiavi quantistiche")
-            print("4. Diagnostica completa")
-            print("5. Esci")
-            print("="*60)
-            
-            choice = input("\nSeleziona opzione (1-5): ")
-            
-            if choice == "1":
-                manager.check_status()
-                input("\nPremi INVIO per continuare...")
-                
-            elif choice == "2":
-                interval = input("Intervallo controlli in secondi (default 30): ")
-                interval = int(interval) if interval else 30
-                manager.continuous_monitor(interval)
-                
-            elif choice == "3":
-                count = input("Numero di chiavi da richiedere (default 1): ")
-                count = int(count) if count else 1
-                manager.get_keys(count)
-                input("\nPremi INVIO per continuare...")
-                
-            elif choice == "4":
-                manager.run_diagnostic()
-                input("\nPremi INVIO per continuare...")
-                
-            elif choice == "5":
-                print(f"\n{YELLOW}Uscita dal gestore nodo {NODE_NAME}.{RESET}")
-                break
-                
+        else:
+            print(f"{RED}Opzione non valida!{RESET}")
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    if getattr(args, "json", False):
+        # Output per script/pipeline: tutto il testo decorato va su stderr e
+        # su stdout c'è sempre esattamente una riga JSON, anche in caso di errore
+        success, response, error = False, None, None
+        with contextlib.redirect_stdout(sys.stderr):
+            manager = QKDNodeManager(check_certs=False)
+            _, missing = manager.scan_certificates()
+            if missing:
+                error = f"Certificati mancanti: {', '.join(missing)}"
             else:
-                print(f"{RED}Opzione non valida!{RESET}")
+                manager.check_certificates()  # Solo avvisi sui permessi della chiave
+                try:
+                    if args.command == "status":
+                        success, response = manager.check_status()
+                    else:
+                        success, response = manager.get_keys(args.count)
+                except (QKDClientError, requests.RequestException) as e:
+                    error = str(e)
+        print(json.dumps({"node": NODE_NAME, "success": success,
+                          "response": response, "error": error}))
+        sys.exit(0 if success else 1)
+    
+    print(BANNER)
+    
+    manager = QKDNodeManager()
+    
+    if args.command == "status":
+        success, _ = manager.check_status()
+        sys.exit(0 if success else 1)
+    elif args.command == "monitor":
+        manager.continuous_monitor(args.interval, ui_refresh=args.ui_refresh)
+    elif args.command == "keys":
+        success, _ = manager.get_keys(args.count)
+        sys.exit(0 if success else 1)
+    elif args.command == "diagnostic":
+        manager.run_diagnostic()
+    else:
+        interactive_menu(manager)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
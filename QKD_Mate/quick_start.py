@@ -20,8 +20,14 @@ Uso:
 import os
 import sys
 import subprocess
+from importlib.util import find_spec
 from pathlib import Path
 
+# setup.py, cert_manager.py e qkd_node_manager.py vengono importati ed eseguiti
+# nello stesso processo (niente avvio di un nuovo interprete per ogni azione);
+# gli import sono locali ai metodi perché requests/yaml potrebbero non essere
+# ancora installati
+
 # Colori per output
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -31,6 +37,48 @@ CYAN = '\033[96m'
 RESET = '\033[0m'
 BOLD = '\033[1m'
 
+def _run_main(module_name, *argv):
+    """Esegue module.main(argv) in-process e restituisce un exit code stile subprocess"""
+    try:
+        # Anche l'import può terminare con sys.exit (es. qkd_node_manager con
+        # NODE_TYPE non valido): va riportato come passo fallito, non chiudere quick start
+        module = __import__(module_name)
+        result = module.main(list(argv))
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 1 if result is False else 0
+
+def _forget_node_manager():
+    """Dopo il setup node_config.yaml può essere cambiato: qkd_node_manager
+    legge NODE_TYPE all'import, quindi va reimportato alla prossima azione"""
+    sys.modules.pop("qkd_node_manager", None)
+
+# Testi fissi dell'interfaccia, costruiti una sola volta all'import
+# e stampati con una sola scrittura
+WELCOME = (
+    f"\n{BLUE}{'='*60}{RESET}\n"
+    f"{BLUE}{BOLD}🚀 Benvenuto in QKD_Mate! 🚀{RESET}\n"
+    f"{BLUE}{'='*60}{RESET}\n"
+    f"{CYAN}Client per Quantum Key Distribution conforme ETSI GS QKD 014{RESET}\n"
+)
+QUICK_ACTIONS = (
+    f"\n{BLUE}🎯 Azioni rapide disponibili:{RESET}\n"
+    f"  1. {CYAN}Avvia Node Manager{RESET} - Interfaccia principale\n"
+    f"  2. {CYAN}Test di connettività{RESET} - Verifica stato nodi\n"
+    f"  3. {CYAN}Diagnostica completa{RESET} - Controllo sistema completo\n"
+    f"  4. {CYAN}Gestione certificati{RESET} - Installa/valida certificati\n"
+    f"  5. {CYAN}Setup configurazione{RESET} - Riconfigura il sistema\n"
+    f"  6. {CYAN}Esci{RESET}"
+)
+CERT_MENU = (
+    f"\n{BLUE}🔐 Gestione certificati...{RESET}\n"
+    "  1. Installa certificati\n"
+    "  2. Valida certificati esistenti\n"
+    "  3. Ripara problemi certificati\n"
+    "  4. Lista certificati\n"
+    "  5. Torna indietro"
+)
+
 class QuickStart:
     def __init__(self):
         self.project_root = Path(__file__).parent
@@ -39,44 +87,64 @@ class QuickStart:
     
     def print_welcome(self):
         """Stampa messaggio di benvenuto"""
-        print(f"\n{BLUE}{'='*60}{RESET}")
-        print(f"{BLUE}{BOLD}🚀 Benvenuto in QKD_Mate! 🚀{RESET}")
-        print(f"{BLUE}{'='*60}{RESET}")
-        print(f"{CYAN}Client per Quantum Key Distribution conforme ETSI GS QKD 014{RESET}\n")
+        print(WELCOME)
     
-    def check_installation_status(self):
-        """Controlla lo stato dell'installazione"""
-        print(f"{BLUE}🔍 Controllo stato installazione...{RESET}")
-        
-        issues = []
-        
-        # Controlla dipendenze Python
-        try:
-            import requests
-            import yaml
+    def _check_dependencies(self, entries):
+        """Dipendenze Python (find_spec trova il modulo senza importarlo)"""
+        missing = [name for name in ("requests", "yaml") if find_spec(name) is None]
+        if not missing:
             print(f"{GREEN}✅ Dipendenze Python installate{RESET}")
-        except ImportError as e:
-            issues.append(("dependencies", f"Dipendenze mancanti: {e}"))
-            print(f"{RED}❌ Dipendenze Python mancanti{RESET}")
-        
-        # Controlla directory certificati
-        if self.certs_dir.exists():
-            cert_files = list(self.certs_dir.glob('*'))
-            if cert_files:
-                print(f"{GREEN}✅ Directory certificati presente ({len(cert_files)} file){RESET}")
-            else:
-                issues.append(("certificates", "Directory certificati vuota"))
-                print(f"{YELLOW}⚠️  Directory certificati vuota{RESET}")
-        else:
-            issues.append(("certificates", "Directory certificati mancante"))
+            return None
+        print(f"{RED}❌ Dipendenze Python mancanti{RESET}")
+        return f"Dipendenze mancanti: {', '.join(missing)}"
+    
+    def _check_certificates(self, entries):
+        """Directory certificati presente e non vuota"""
+        certs = entries.get(self.certs_dir.name)
+        if certs is None or not certs.is_dir():
             print(f"{RED}❌ Directory certificati mancante{RESET}")
-        
-        # Controlla configurazione nodo
-        if self.node_config.exists():
+            return "Directory certificati mancante"
+        with os.scandir(certs.path) as it:
+            # Come glob('*'): i file nascosti (es. .gitkeep) non contano
+            cert_count = sum(1 for entry in it if not entry.name.startswith("."))
+        if not cert_count:
+            print(f"{YELLOW}⚠️  Directory certificati vuota{RESET}")
+            return "Directory certificati vuota"
+        print(f"{GREEN}✅ Directory certificati presente ({cert_count} file){RESET}")
+        return None
+    
+    def _check_node_config(self, entries):
+        """File node_config.yaml presente"""
+        if self.node_config.name in entries:
             print(f"{GREEN}✅ Configurazione nodo presente{RESET}")
-        else:
-            issues.append(("config", "Configurazione nodo mancante"))
-            print(f"{YELLOW}⚠️  Configurazione nodo mancante{RESET}")
+            return None
+        print(f"{YELLOW}⚠️  Configurazione nodo mancante{RESET}")
+        return "Configurazione nodo mancante"
+    
+    def check_installation_status(self, categories=None):
+        """Controlla lo stato dell'installazione
+        
+        categories: tipi di problema da ricontrollare ("dependencies",
+        "certificates", "config"); None per il controllo completo
+        """
+        print(f"{BLUE}🔍 Controllo stato installazione...{RESET}")
+        
+        # Una sola lettura della directory del progetto al posto di stat separati
+        with os.scandir(self.project_root) as it:
+            entries = {entry.name: entry for entry in it}
+        
+        checks = (
+            ("dependencies", self._check_dependencies),
+            ("certificates", self._check_certificates),
+            ("config", self._check_node_config),
+        )
+        issues = []
+        for issue_type, check in checks:
+            if categories is not None and issue_type not in categories:
+                continue
+            description = check(entries)
+            if description is not None:
+                issues.append((issue_type, description))
         
         return issues
     
@@ -118,12 +186,11 @@ class QuickStart:
         print(f"\n{BLUE}🔧 Avvio setup automatico...{RESET}")
         
         try:
-            # Esegui setup.py
-            result = subprocess.run([sys.executable, "setup.py"], 
-                                  cwd=self.project_root,
-                                  capture_output=False)
+            # Esegui il setup di setup.py nello stesso processo
+            returncode = _run_main("setup")
+            _forget_node_manager()
             
-            if result.returncode == 0:
+            if returncode == 0:
                 print(f"{GREEN}✅ Setup completato con successo!{RESET}")
                 return True
             else:
@@ -136,13 +203,7 @@ class QuickStart:
     
     def show_quick_actions(self):
         """Mostra azioni rapide disponibili"""
-        print(f"\n{BLUE}🎯 Azioni rapide disponibili:{RESET}")
-        print(f"  1. {CYAN}Avvia Node Manager{RESET} - Interfaccia principale")
-        print(f"  2. {CYAN}Test di connettività{RESET} - Verifica stato nodi")
-        print(f"  3. {CYAN}Diagnostica completa{RESET} - Controllo sistema completo")
-        print(f"  4. {CYAN}Gestione certificati{RESET} - Installa/valida certificati")
-        print(f"  5. {CYAN}Setup configurazione{RESET} - Riconfigura il sistema")
-        print(f"  6. {CYAN}Esci{RESET}")
+        print(QUICK_ACTIONS)
         
         while True:
             choice = input(f"\n{YELLOW}Seleziona un'azione (1-6): {RESET}").strip()
@@ -165,11 +226,19 @@ class QuickStart:
                 print(f"{RED}❌ Scelta non valida. Inserisci un numero da 1 a 6.{RESET}")
     
     def launch_node_manager(self):
-        """Avvia il node manager"""
+        """Avvia il node manager (azione finale: quick start termina qui)"""
         print(f"\n{BLUE}🚀 Avvio Node Manager...{RESET}")
+        # La TUI del node manager gestisce da sé Ctrl+C e l'uscita; dopo di lei
+        # quick start non ha altro da fare, quindi su POSIX il processo viene
+        # sostituito (execv) invece di restare in attesa del figlio
+        script = str(self.project_root / "qkd_node_manager.py")
         try:
-            subprocess.run([sys.executable, "qkd_node_manager.py"], 
-                          cwd=self.project_root)
+            if os.name == "posix":
+                sys.stdout.flush()
+                os.execv(sys.executable, [sys.executable, script])
+            # Su Windows execv non sostituisce il processo nella console:
+            # il figlio resta in foreground solo con subprocess
+            subprocess.run([sys.executable, script], cwd=self.project_root)
         except KeyboardInterrupt:
             print(f"\n{CYAN}Node Manager chiuso.{RESET}")
         except Exception as e:
@@ -179,9 +248,7 @@ class QuickStart:
         """Esegue test di connettività rapido"""
         print(f"\n{BLUE}🌐 Test di connettività...{RESET}")
         try:
-            result = subprocess.run([sys.executable, "qkd_node_manager.py", "status"], 
-                                  cwd=self.project_root,
-                                  capture_output=False)
+            _run_main("qkd_node_manager", "status")
             input(f"\n{YELLOW}Premi INVIO per continuare...{RESET}")
         except Exception as e:
             print(f"{RED}❌ Errore nel test: {e}{RESET}")
@@ -190,21 +257,14 @@ class QuickStart:
         """Esegue diagnostica completa"""
         print(f"\n{BLUE}🔬 Diagnostica completa...{RESET}")
         try:
-            result = subprocess.run([sys.executable, "qkd_node_manager.py", "diagnostic"], 
-                                  cwd=self.project_root,
-                                  capture_output=False)
+            _run_main("qkd_node_manager", "diagnostic")
             input(f"\n{YELLOW}Premi INVIO per continuare...{RESET}")
         except Exception as e:
             print(f"{RED}❌ Errore nella diagnostica: {e}{RESET}")
     
     def launch_cert_manager(self):
         """Avvia il gestore certificati"""
-        print(f"\n{BLUE}🔐 Gestione certificati...{RESET}")
-        print(f"  1. Installa certificati")
-        print(f"  2. Valida certificati esistenti")
-        print(f"  3. Ripara problemi certificati")
-        print(f"  4. Lista certificati")
-        print(f"  5. Torna indietro")
+        print(CERT_MENU)
         
         choice = input(f"\n{YELLOW}Scelta (1-5): {RESET}").strip()
         
@@ -217,9 +277,7 @@ class QuickStart:
         
         if choice in commands:
             try:
-                subprocess.run([sys.executable, "cert_manager.py", commands[choice]], 
-                              cwd=self.project_root,
-                              capture_output=False)
+                _run_main("cert_manager", commands[choice])
                 input(f"\n{YELLOW}Premi INVIO per continuare...{RESET}")
             except Exception as e:
                 print(f"{RED}❌ Errore: {e}{RESET}")
@@ -230,14 +288,16 @@ class QuickStart:
         """Avvia il setup"""
         print(f"\n{BLUE}⚙️  Setup configurazione...{RESET}")
         try:
-            subprocess.run([sys.executable, "setup.py"], 
-                          cwd=self.project_root,
-                          capture_output=False)
+            _run_main("setup")
+            _forget_node_manager()
         except Exception as e:
             print(f"{RED}❌ Errore nel setup: {e}{RESET}")
     
     def run(self):
         """Esegue il quick start"""
+        # I moduli del progetto usano percorsi relativi (certs/, node_config.yaml,
+        # requirements.txt) e ora girano in questo processo
+        os.chdir(self.project_root)
         self.print_welcome()
         
         # Controlla stato installazione
@@ -250,8 +310,9 @@ class QuickStart:
                 print(f"{CYAN}Esegui il setup quando sei pronto e riprova.{RESET}")
                 return
             
-            # Ricontrolla dopo il fix
-            issues = self.check_installation_status()
+            # Ricontrolla dopo il fix solo ciò che prima non andava: il setup
+            # non tocca quello che era già a posto
+            issues = self.check_installation_status({issue_type for issue_type, _ in issues})
         
         if not issues:
             print(f"\n{GREEN}🎉 Sistema pronto all'uso!{RESET}")
@@ -21,7 +21,12 @@ import os
 import sys
 import subprocess
 import shutil
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from importlib import metadata
+from importlib.util import find_spec
 import platform
 
 # Colori per output
@@ -33,6 +38,174 @@ CYAN = '\033[96m'
 RESET = '\033[0m'
 BOLD = '\033[1m'
 
+# Testi fissi dell'interfaccia, costruiti una sola volta all'import
+# e stampati con una sola scrittura
+HEADER = (
+    f"\n{BLUE}{'='*70}{RESET}\n"
+    f"{BLUE}{BOLD}🔐 QKD_Mate - Setup Automatizzato 🔐{RESET}\n"
+    f"{BLUE}{'='*70}{RESET}\n"
+    f"{CYAN}Installazione semplificata per client Quantum Key Distribution{RESET}\n"
+    f"{CYAN}Conforme allo standard ETSI GS QKD 014{RESET}\n"
+)
+if platform.system().lower() == "windows":
+    _START_HINT = f"   {CYAN}Oppure fai doppio click su: start_qkd.bat{RESET}"
+else:
+    _START_HINT = f"   {CYAN}Oppure esegui: ./start_qkd.sh{RESET}"
+COMPLETION_SUMMARY = (
+    f"\n{GREEN}{'='*70}{RESET}\n"
+    f"{GREEN}{BOLD}🎉 INSTALLAZIONE COMPLETATA! 🎉{RESET}\n"
+    f"{GREEN}{'='*70}{RESET}\n"
+    f"\n{CYAN}📋 Prossimi passi:{RESET}\n"
+    f"1. {YELLOW}Copia i certificati nella directory certs/{RESET}\n"
+    f"2. {YELLOW}Avvia con: python qkd_node_manager.py{RESET}\n"
+    f"{_START_HINT}\n"
+    f"\n{CYAN}🔧 Comandi utili:{RESET}\n"
+    f"  {YELLOW}python qkd_node_manager.py diagnostic{RESET} - Test completo\n"
+    f"  {YELLOW}python qkd_node_manager.py status{RESET}     - Verifica stato\n"
+    f"  {YELLOW}python setup.py --verify{RESET}              - Verifica setup\n"
+    f"\n{BLUE}📖 Per maggiori informazioni consulta il README.md{RESET}"
+)
+
+# Porta HTTPS dei KME e timeout della connessione di prova
+KME_PORT = 443
+PROBE_TIMEOUT = 2
+KME_ENDPOINTS = (
+    ("Alice KME", "78.40.171.143"),
+    ("Bob KME", "78.40.171.144"),
+)
+
+# Unica fonte delle dipendenze, letta sia dal pre-controllo sia da pip
+REQUIREMENTS_FILE = Path(__file__).parent / "requirements.txt"
+
+# Certificati richiesti per tipo di nodo (nodo non configurato: tutti)
+REQUIRED_CERTS = {
+    "alice": ("ca_alice.crt", "client_Alice2.crt", "client_Alice2.key"),
+    "bob": ("ca_bob.crt", "client_Bob2.crt", "client_Bob2.key"),
+}
+ALL_CERTS = (
+    "ca_alice.crt", "ca_bob.crt",
+    "client_Alice2.crt", "client_Alice2.key",
+    "client_Bob2.crt", "client_Bob2.key",
+)
+
+def _version_tuple(version):
+    """'2.32.3' -> (2, 32, 3); si ferma alla prima parte non numerica (es. 'rc1')"""
+    parts = []
+    for part in version.split("."):
+        if not part.isdigit():
+            break
+        parts.append(int(part))
+    return tuple(parts)
+
+def _read_requirements(path=REQUIREMENTS_FILE):
+    """
+    Requisiti di requirements.txt come (riga originale, nome, versione minima o None).
+    
+    Supporta le righe del tipo 'nome', 'nome>=X' e 'nome==X'; per qualsiasi
+    altra forma (extras, marker, ~=, opzioni di pip) la versione minima è
+    sconosciuta e il nome è None, così il requisito viene lasciato a pip.
+    """
+    requirements = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            for op in (">=", "=="):
+                name, sep, version = line.partition(op)
+                if sep:
+                    break
+            name = name.strip()
+            simple = (name.replace("-", "").replace("_", "").replace(".", "").isalnum()
+                      and "," not in version and not any(c in version for c in "<>=!~;"))
+            if simple:
+                requirements.append((line, name, version.strip() or None))
+            else:
+                requirements.append((line, None, None))
+    return requirements
+
+def _missing_packages():
+    """Righe di requirements.txt non soddisfatte (o non verificabili) dai pacchetti installati"""
+    missing = []
+    for line, name, minimum in _read_requirements():
+        if name is not None:
+            try:
+                installed = metadata.version(name)
+                if minimum is None or _version_tuple(installed) >= _version_tuple(minimum):
+                    continue
+            except metadata.PackageNotFoundError:
+                pass
+        missing.append(line)
+    return missing
+
+class _PipControl:
+    """Processo pip avviato in background da run_full_setup, interrompibile con Ctrl+C"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proc = None
+        self._cancelled = False
+    
+    def popen(self, cmd):
+        """Avvia pip; None se il setup è già stato interrotto"""
+        with self._lock:
+            if self._cancelled:
+                return None
+            self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                          stderr=subprocess.PIPE, text=True)
+            return self._proc
+    
+    def cancel(self):
+        """Impedisce l'avvio di pip o termina quello in corso"""
+        with self._lock:
+            self._cancelled = True
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.terminate()
+
+def _install_missing(control=None):
+    """Installa i requisiti mancanti senza stampare nulla: restituisce (esito, messaggio)
+    
+    Non usa input né stdout, quindi run_full_setup può eseguirlo in background;
+    control (_PipControl) permette di interrompere pip da un altro thread.
+    """
+    # Controllo sui metadati installati: pip parte solo se manca qualcosa
+    missing = _missing_packages()
+    if not missing:
+        return True, "Dipendenze già installate"
+    
+    try:
+        # Controlla se pip è disponibile (metadati installati, senza avviare un interprete)
+        metadata.version("pip")
+    except metadata.PackageNotFoundError:
+        return False, "pip non trovato. Installa pip e riprova."
+    
+    # pip riceve il requirements.txt stesso (anche le righe che il
+    # pre-controllo non sa interpretare) e salta i requisiti già soddisfatti
+    cmd = [sys.executable, "-m", "pip", "install", "-q",
+           "--disable-pip-version-check", "--no-input", "-r", str(REQUIREMENTS_FILE)]
+    if control is None:
+        control = _PipControl()
+    proc = control.popen(cmd)
+    if proc is None:
+        return False, "Installazione dipendenze annullata"
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        return False, f"Errore nell'installazione delle dipendenze:\n{stderr}"
+    return True, "Dipendenze installate con successo"
+
+def _tcp_probe(ip, port=KME_PORT, timeout=PROBE_TIMEOUT):
+    """Verifica con una connessione TCP diretta che la porta del KME sia aperta"""
+    try:
+        socket.create_connection((ip, port), timeout).close()
+        return True
+    except OSError:
+        return False
+
+def _probe_endpoints():
+    """Esito di _tcp_probe per ogni KME_ENDPOINTS, con tutti gli endpoint in parallelo"""
+    with ThreadPoolExecutor(max_workers=len(KME_ENDPOINTS)) as executor:
+        return list(executor.map(_tcp_probe, (ip for _, ip in KME_ENDPOINTS)))
+
 class QKDSetup:
     def __init__(self):
         self.project_root = Path(__file__).parent
@@ -41,11 +214,7 @@ class QKDSetup:
         
     def print_header(self):
         """Stampa l'header di benvenuto"""
-        print(f"\n{BLUE}{'='*70}{RESET}")
-        print(f"{BLUE}{BOLD}🔐 QKD_Mate - Setup Automatizzato 🔐{RESET}")
-        print(f"{BLUE}{'='*70}{RESET}")
-        print(f"{CYAN}Installazione semplificata per client Quantum Key Distribution{RESET}")
-        print(f"{CYAN}Conforme allo standard ETSI GS QKD 014{RESET}\n")
+        print(HEADER)
     
     def check_python_version(self):
         """Verifica che la versione di Python sia compatibile"""
@@ -60,28 +229,19 @@ class QKDSetup:
         print(f"{GREEN}✅ Python {version.major}.{version.minor}.{version.micro} - OK{RESET}")
         return True
     
-    def install_dependencies(self):
-        """Installa le dipendenze Python automaticamente"""
-        print(f"\n{BLUE}📦 Installazione dipendenze...{RESET}")
+    def install_dependencies(self, job=None):
+        """Installa le dipendenze Python automaticamente
         
-        try:
-            # Controlla se pip è disponibile
-            subprocess.run([sys.executable, "-m", "pip", "--version"], 
-                         check=True, capture_output=True)
-        except subprocess.CalledProcessError:
-            print(f"{RED}❌ pip non trovato. Installa pip e riprova.{RESET}")
-            return False
+        job: Future di _install_missing già avviato in background (run_full_setup)
+        """
+        print(f"\n{BLUE}📦 Installazione dipendenze...{RESET}")
         
-        try:
-            # Installa dipendenze
-            cmd = [sys.executable, "-m", "pip", "install", "-r", "requirements.txt"]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            print(f"{GREEN}✅ Dipendenze installate con successo{RESET}")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"{RED}❌ Errore nell'installazione delle dipendenze:{RESET}")
-            print(f"{RED}{e.stderr}{RESET}")
-            return False
+        ok, message = job.result() if job is not None else _install_missing()
+        if ok:
+            print(f"{GREEN}✅ {message}{RESET}")
+        else:
+            print(f"{RED}❌ {message}{RESET}")
+        return ok
     
     def setup_certificates_directory(self):
         """Crea la directory dei certificati se non existe"""
@@ -97,6 +257,10 @@ class QKDSetup:
     
     def interactive_node_configuration(self):
         """Configurazione interattiva del tipo di nodo"""
+        return self.write_node_config(self.ask_node_type())
+    
+    def ask_node_type(self):
+        """Chiede il tipo di nodo: "alice", "bob" o None (configurazione rimandata)"""
         print(f"\n{BLUE}⚙️  Configurazione nodo QKD...{RESET}")
         print(f"{CYAN}Seleziona il tipo di nodo che vuoi configurare:{RESET}\n")
         
@@ -108,18 +272,24 @@ class QKDSetup:
             choice = input(f"\n{YELLOW}Scelta (1-3): {RESET}").strip()
             
             if choice == "1":
-                node_type = "alice"
-                print(f"{GREEN}✅ Configurato come Alice (Master){RESET}")
-                break
+                return "alice"
             elif choice == "2":
-                node_type = "bob"
-                print(f"{GREEN}✅ Configurato come Bob (Slave){RESET}")
-                break
+                return "bob"
             elif choice == "3":
-                print(f"{YELLOW}⚠️  Configurazione rimandata. Modifica node_config.yaml manualmente.{RESET}")
-                return True
+                return None
             else:
                 print(f"{RED}❌ Scelta non valida. Inserisci 1, 2 o 3.{RESET}")
+    
+    def write_node_config(self, node_type):
+        """Scrive node_config.yaml per il tipo di nodo scelto (None: nessun file)"""
+        if node_type is None:
+            print(f"{YELLOW}⚠️  Configurazione rimandata. Modifica node_config.yaml manualmente.{RESET}")
+            return True
+        
+        if node_type == "alice":
+            print(f"{GREEN}✅ Configurato come Alice (Master){RESET}")
+        else:
+            print(f"{GREEN}✅ Configurato come Bob (Slave){RESET}")
         
         # Crea il file di configurazione
         config_content = f"node_type: {node_type}\n"
@@ -138,37 +308,35 @@ class QKDSetup:
         if self.node_config_path.exists():
             try:
                 import yaml
+                # Parser C (libyaml) se disponibile, come in src/client.py
+                loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
                 with open(self.node_config_path) as f:
-                    config = yaml.safe_load(f)
+                    config = yaml.load(f, Loader=loader)
                     node_type = config.get('node_type')
             except:
                 pass
         
-        required_certs = []
-        if node_type == "alice":
-            required_certs.extend(["ca_alice.crt", "client_Alice2.crt", "client_Alice2.key"])
-        elif node_type == "bob":
-            required_certs.extend(["ca_bob.crt", "client_Bob2.crt", "client_Bob2.key"])
-        else:
-            required_certs.extend([
-                "ca_alice.crt", "ca_bob.crt",
-                "client_Alice2.crt", "client_Alice2.key",
-                "client_Bob2.crt", "client_Bob2.key"
-            ])
+        required_certs = REQUIRED_CERTS.get(node_type, ALL_CERTS)
         
         missing_certs = []
         present_certs = []
         
+        # Una sola scansione della directory invece di un exists() per file
+        try:
+            with os.scandir(self.certs_dir) as it:
+                entries = {entry.name: entry for entry in it if entry.is_file()}
+        except FileNotFoundError:
+            entries = {}
+        
         for cert in required_certs:
-            cert_path = self.certs_dir / cert
-            if cert_path.exists():
+            entry = entries.get(cert)
+            if entry is not None:
                 present_certs.append(cert)
                 # Controlla permessi per le chiavi private
                 if cert.endswith('.key'):
-                    stat_info = cert_path.stat()
-                    if stat_info.st_mode & 0o077:
+                    if entry.stat().st_mode & 0o077:
                         print(f"{YELLOW}⚠️  {cert} ha permessi troppo aperti{RESET}")
-                        cert_path.chmod(0o600)
+                        os.chmod(entry.path, 0o600)
                         print(f"{GREEN}✅ Permessi corretti impostati per {cert}{RESET}")
             else:
                 missing_certs.append(cert)
@@ -187,36 +355,21 @@ class QKDSetup:
         print(f"{GREEN}🎉 Tutti i certificati richiesti sono presenti!{RESET}")
         return True
     
-    def test_connectivity(self):
-        """Test di connettività di base"""
+    def test_connectivity(self, job=None):
+        """Test di connettività di base
+        
+        job: Future di _probe_endpoints già avviato in background (run_full_setup)
+        """
         print(f"\n{BLUE}🌐 Test connettività di rete...{RESET}")
         
-        # Test ping agli endpoint
-        endpoints = [
-            ("Alice KME", "78.40.171.143"),
-            ("Bob KME", "78.40.171.144")
-        ]
+        # Connessione TCP alla porta HTTPS dei KME (quella usata dal client;
+        # l'ICMP del ping è spesso filtrato), tutti gli endpoint in parallelo
+        results = job.result() if job is not None else _probe_endpoints()
         
-        connectivity_ok = True
-        for name, ip in endpoints:
-            print(f"  Testing {name} ({ip})...", end=" ")
-            
-            # Usa ping appropriato per il sistema operativo
-            if platform.system().lower() == "windows":
-                cmd = ["ping", "-n", "1", "-w", "2000", ip]
-            else:
-                cmd = ["ping", "-c", "1", "-W", "2", ip]
-            
-            try:
-                result = subprocess.run(cmd, capture_output=True, timeout=5)
-                if result.returncode == 0:
-                    print(f"{GREEN}✅{RESET}")
-                else:
-                    print(f"{RED}❌{RESET}")
-                    connectivity_ok = False
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                print(f"{YELLOW}⚠️{RESET}")
-                connectivity_ok = False
+        for (name, ip), reachable in zip(KME_ENDPOINTS, results):
+            icon = f"{GREEN}✅{RESET}" if reachable else f"{RED}❌{RESET}"
+            print(f"  Testing {name} ({ip}:{KME_PORT})... {icon}")
+        connectivity_ok = all(results)
         
         if connectivity_ok:
             print(f"{GREEN}🌐 Connettività di rete OK{RESET}")
@@ -256,25 +409,7 @@ python3 qkd_node_manager.py
     
     def print_completion_summary(self):
         """Stampa il riassunto dell'installazione"""
-        print(f"\n{GREEN}{'='*70}{RESET}")
-        print(f"{GREEN}{BOLD}🎉 INSTALLAZIONE COMPLETATA! 🎉{RESET}")
-        print(f"{GREEN}{'='*70}{RESET}")
-        
-        print(f"\n{CYAN}📋 Prossimi passi:{RESET}")
-        print(f"1. {YELLOW}Copia i certificati nella directory certs/{RESET}")
-        print(f"2. {YELLOW}Avvia con: python qkd_node_manager.py{RESET}")
-        
-        if platform.system().lower() == "windows":
-            print(f"   {CYAN}Oppure fai doppio click su: start_qkd.bat{RESET}")
-        else:
-            print(f"   {CYAN}Oppure esegui: ./start_qkd.sh{RESET}")
-        
-        print(f"\n{CYAN}🔧 Comandi utili:{RESET}")
-        print(f"  {YELLOW}python qkd_node_manager.py diagnostic{RESET} - Test completo")
-        print(f"  {YELLOW}python qkd_node_manager.py status{RESET}     - Verifica stato")
-        print(f"  {YELLOW}python setup.py --verify{RESET}              - Verifica setup")
-        
-        print(f"\n{BLUE}📖 Per maggiori informazioni consulta il README.md{RESET}")
+        print(COMPLETION_SUMMARY)
     
     def verify_installation(self):
         """Verifica l'installazione esistente"""
@@ -304,25 +439,54 @@ python3 qkd_node_manager.py
         return all_ok
     
     def check_dependencies(self):
-        """Controlla se le dipendenze sono installate"""
-        try:
-            import requests
-            import yaml
-            return True
-        except ImportError:
-            return False
+        """Controlla se le dipendenze sono installate (senza importarle)"""
+        return all(find_spec(name) is not None for name in ("requests", "yaml"))
     
     def run_full_setup(self):
         """Esegue il setup completo"""
         self.print_header()
         
+        if not self.check_python_version():
+            print(f"\n{RED}❌ Setup interrotto al passo: Controllo Python{RESET}")
+            return False
+        
+        # pip e test di rete non chiedono input e non stampano: partono subito in
+        # background e proseguono mentre l'utente sceglie il tipo di nodo.
+        # Con Ctrl+C i job non ancora partiti vengono annullati e pip terminato,
+        # senza attendere la fine dell'installazione
+        executor = ThreadPoolExecutor(max_workers=2)
+        pip_control = _PipControl()
+        interrupted = False
+        try:
+            deps_job = executor.submit(_install_missing, pip_control)
+            probe_job = executor.submit(_probe_endpoints)
+            return self._run_setup_steps(deps_job, probe_job)
+        except KeyboardInterrupt:
+            interrupted = True
+            pip_control.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=not interrupted, cancel_futures=interrupted)
+    
+    def _run_setup_steps(self, deps_job, probe_job):
+        """Passi di run_full_setup dopo il controllo Python, con pip e test di rete già avviati"""
+        node_type = None
+        
+        def ask_node_type():
+            nonlocal node_type
+            node_type = self.ask_node_type()
+            return True
+        
+        # node_config.yaml viene scritto solo dopo l'esito di pip: un errore
+        # nelle dipendenze non lascia un'installazione configurata a metà.
+        # Le dipendenze servono anche al controllo certificati, che usa yaml
         steps = [
-            ("Controllo Python", self.check_python_version),
-            ("Installazione dipendenze", self.install_dependencies),
             ("Setup certificati", self.setup_certificates_directory),
-            ("Configurazione nodo", self.interactive_node_configuration),
+            ("Scelta tipo nodo", ask_node_type),
+            ("Installazione dipendenze", lambda: self.install_dependencies(deps_job)),
+            ("Scrittura node_config.yaml", lambda: self.write_node_config(node_type)),
             ("Controllo certificati", self.check_certificates_status),
-            ("Test connettività", self.test_connectivity),
+            ("Test connettività", lambda: self.test_connectivity(probe_job)),
             ("Script avvio rapido", self.create_quick_start_script),
         ]
         
@@ -334,13 +498,14 @@ python3 qkd_node_manager.py
         self.print_completion_summary()
         return True
 
-def main():
+def main(argv=None):
+    """Entry point; argv di default sys.argv[1:]. Restituisce l'esito del setup/verifica"""
+    argv = sys.argv[1:] if argv is None else argv
     setup = QKDSetup()
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--verify":
-        setup.verify_installation()
-    else:
-        setup.run_full_setup()
+    if argv and argv[0] == "--verify":
+        return setup.verify_installation()
+    return setup.run_full_setup()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -12,10 +12,16 @@ Alice è il nodo "master" nel protocollo ETSI GS QKD 014, il che significa:
 - Ha priorità nella gestione delle sessioni QKD
 """
 
+from functools import lru_cache
 from pathlib import Path
 from .client import QKDClient
 
+# Percorso del file di configurazione, calcolato una sola volta all'import:
+# partendo da questo modulo (src/) sale alla directory principale QKD_Mate/
+_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "alice.yaml"
 
+
+@lru_cache(maxsize=1)
 def alice_client() -> QKDClient:
     """
     Factory function per creare un client QKD configurato per Alice.
@@ -47,15 +53,16 @@ def alice_client() -> QKDClient:
         print(f"Comunica questo key_ID a Bob: {key_id}")
     
     Note:
+        - Il client viene creato alla prima chiamata e poi riutilizzato
+          (configurazione, contesto TLS e sessione HTTPS condivisi); per un
+          client nuovo usare alice_client_new() oppure alice_client.cache_clear()
         - Alice deve avere i certificati client_Alice2.crt e client_Alice2.key
         - Il KME di Alice deve essere raggiungibile su 78.40.171.143:443
         - Alice può richiedere chiavi ma non può usare key_ID per recuperarle
     """
-    # Determina il percorso del file di configurazione
-    # Partendo dalla posizione di questo modulo (src/), sale di un livello
-    # per raggiungere la directory principale QKD_Mate/
-    module_dir = Path(__file__).parent.parent  # Go up from src/ to QKD_Mate/
-    config_path = module_dir / "config" / "alice.yaml"
-    
-    # Crea e ritorna il client configurato
-    return QKDClient(config_path)
\ No newline at end of file
+    return alice_client_new()
+
+
+def alice_client_new() -> QKDClient:
+    """Crea sempre un nuovo QKDClient per Alice, non condiviso con alice_client()"""
+    return QKDClient(_CONFIG_PATH)
\ No newline at end of file
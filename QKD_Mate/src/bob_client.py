@@ -12,10 +12,16 @@ Bob è il nodo "slave" nel protocollo ETSI GS QKD 014, il che significa:
 - Verifica lo stato dei link QKD con Alice
 """
 
+from functools import lru_cache
 from pathlib import Path
 from .client import QKDClient
 
+# Percorso del file di configurazione, calcolato una sola volta all'import:
+# partendo da questo modulo (src/) sale alla directory principale QKD_Mate/
+_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "bob.yaml"
 
+
+@lru_cache(maxsize=1)
 def bob_client() -> QKDClient:
     """
     Factory function per creare un client QKD configurato per Bob.
@@ -53,16 +59,17 @@ def bob_client() -> QKDClient:
         print(f"Chiave ricevuta: {chiave}")
     
     Note:
+        - Il client viene creato alla prima chiamata e poi riutilizzato
+          (configurazione, contesto TLS e sessione HTTPS condivisi); per un
+          client nuovo usare bob_client_new() oppure bob_client.cache_clear()
         - Bob deve avere i certificati client_Bob2.crt e client_Bob2.key
         - Il KME di Bob deve essere raggiungibile su 78.40.171.144:443
         - Bob può solo recuperare chiavi con key_ID, non richiederne di nuove
         - Il key_ID deve essere comunicato da Alice tramite canale sicuro
     """
-    # Determina il percorso del file di configurazione
-    # Partendo dalla posizione di questo modulo (src/), sale di un livello
-    # per raggiungere la directory principale QKD_Mate/
-    module_dir = Path(__file__).parent.parent  # Go up from src/ to QKD_Mate/
-    config_path = module_dir / "config" / "bob.yaml"
-    
-    # Crea e ritorna il client configurato
-    return QKDClient(config_path)
\ No newline at end of file
+    return bob_client_new()
+
+
+def bob_client_new() -> QKDClient:
+    """Crea sempre un nuovo QKDClient per Bob, non condiviso con bob_client()"""
+    return QKDClient(_CONFIG_PATH)
\ No newline at end of file
@@ -17,15 +17,32 @@ Standard implementato:
 - Quantum Key Distribution (QKD); Protocol and data format of REST-based key delivery API
 """
 
+import functools
 import json
+import re
 import ssl
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from urllib.parse import urljoin
 
 import requests
 import yaml
-from .utils import retry, QKDClientError
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+from .utils import QKDClientError
+
+try:
+    # Dipendenza opzionale: parser JSON in C, più veloce su risposte con molte chiavi
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Loader YAML sicuro in C (libyaml) se PyYAML è compilato con il supporto,
+# altrimenti il SafeLoader in puro Python: stesso comportamento di safe_load
+_YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 def _load_yaml(path: str | Path) -> dict:
     """
@@ -39,12 +56,12 @@ def _load_yaml(path: str | Path) -> dict:
     
     Note:
         - Converte automaticamente il path in assoluto
-        - Usa yaml.safe_load per sicurezza
+        - Usa il loader sicuro (CSafeLoader se disponibile) per sicurezza
         - Ritorna dizionario vuoto se il file è vuoto
     """
     path = Path(path).resolve()  # Convert to absolute path
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+        return yaml.load(f, Loader=_YAMLLoader) or {}
 
 def _merge(base: dict, override: dict) -> dict:
     """
@@ -81,6 +98,67 @@ def _merge(base: dict, override: dict) -> dict:
             out[k] = v
     return out
 
+def _copy_status(status: Any) -> Any:
+    """Copia superficiale di una risposta di status (le risposte non dict restano invariate)"""
+    return dict(status) if isinstance(status, dict) else status
+
+@functools.lru_cache(maxsize=8)
+def _ssl_context(cert: str, key: str, ca: str, signature: tuple) -> ssl.SSLContext:
+    """
+    Costruisce (una sola volta) il contesto TLS per una terna cert/key/CA.
+    
+    La chiave di cache include ``signature`` (inode, dimensione e mtime dei
+    file): finché i certificati su disco non cambiano, tutti i client con la
+    stessa configurazione condividono lo stesso SSLContext, senza rileggere
+    e riparsare i PEM. Un certificato sostituito produce un nuovo contesto.
+    """
+    context = ssl.create_default_context(cafile=ca)
+    context.load_cert_chain(cert, key)
+    return context
+
+# Endpoint che consumano chiavi (ETSI GS QKD 014: enc_keys e dec_keys)
+_KEY_ENDPOINT_RE = re.compile(r"/(?:enc|dec)_keys(?:\?|$)")
+
+class _KeyAwareRetry(Retry):
+    """
+    Retry che non ripete le richieste non idempotenti una volta che il KME
+    le ha ricevute.
+    
+    Per enc_keys/dec_keys e per qualsiasi POST solo gli errori di
+    connessione (richiesta mai arrivata al server) vengono ritentati.
+    Un errore di lettura o una risposta 502/503/504 non vengono ripetuti:
+    il KME potrebbe aver già consegnato le chiavi, e per ETSI un 503 su
+    questi endpoint significa chiavi non disponibili, non un guasto
+    transitorio. Le altre richieste GET (es. status) seguono la policy di Retry.
+    """
+    def increment(self, method=None, url=None, response=None, error=None,
+                  _pool=None, _stacktrace=None):
+        consumes = method == "POST" or (url is not None and _KEY_ENDPOINT_RE.search(url))
+        if consumes and (response is not None or not self._is_connection_error(error)):
+            # Come un Retry esaurito: con raise_on_status=False urllib3
+            # restituisce la risposta così com'è, un errore viene propagato
+            raise MaxRetryError(_pool, url, error or ResponseError(
+                f"risposta {response.status} non ritentata su endpoint non idempotente"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+class _SSLContextAdapter(HTTPAdapter):
+    """
+    HTTPAdapter che usa un SSLContext già configurato (CA + certificato
+    client) per tutte le connessioni, invece di far caricare a urllib3 i
+    file cert/key/CA ad ogni nuova connessione.
+    """
+    def __init__(self, ssl_context: ssl.SSLContext, **kwargs):
+        self._ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self._ssl_context
+        return super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs["ssl_context"] = self._ssl_context
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
 class QKDClient:
     """
     Client HTTPS mTLS per nodi QKD/KME conforme a ETSI GS QKD 014.
@@ -102,7 +180,9 @@ class QKDClient:
       - key: Percorso alla chiave privata (.key)
       - ca: Percorso al certificato CA (.crt)
       - timeout_sec: Timeout richieste HTTP (default: 10)
-      - retries: Numero di retry (default: 2)
+      - retries: Numero di retry su errori di rete e HTTP 502/503/504 (default: 2); enc_keys/dec_keys e POST solo su errori di connessione
+      - status_cache_sec: Cache delle risposte di status in secondi (default: 2)
+      - pool_maxsize: Connessioni HTTPS mantenute verso il KME (default: 4)
       - api_paths: Mapping degli endpoint API
     
     Endpoint supportati (ETSI GS QKD 014):
@@ -157,18 +237,66 @@ class QKDClient:
         self.timeout = int(cfg.get("timeout_sec", 10))  # Timeout HTTP
         self.retries = int(cfg.get("retries", 2))  # Numero retry
         self.api_paths: Dict[str, str] = cfg.get("api_paths", {})  # Mapping API
+        # Validità (secondi) delle risposte di get_status in cache; 0 disabilita
+        self.status_cache_sec = float(cfg.get("status_cache_sec", 2))
+        self._status_cache: Dict[str, tuple] = {}  # slave_id -> (istante, risposta)
+        # Connessioni keep-alive verso il KME: dimensiona il numero di
+        # richieste concorrenti che lo stesso client può servire
+        self.pool_maxsize = max(1, int(cfg.get("pool_maxsize", 4)))
+        # Ultimo status ricevuto per slave_id: i limiti del link (max_key_per_request,
+        # min/max_key_size, max_SAE_ID_count) servono a validare get_key in locale
+        self._link_limits: Dict[str, dict] = {}
 
         # Verifica esistenza file certificati (critico per mTLS)
+        signature = []
         for cert_file in [*self.cert, self.verify]:
-            if not Path(cert_file).exists():
+            try:
+                st = Path(cert_file).stat()
+            except FileNotFoundError:
                 raise QKDClientError(
                     f"File certificato non trovato: {cert_file}\n"
                     f"Assicurati che tutti i certificati siano presenti nella directory certs/"
-                )
+                ) from None
+            signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
 
         # Configurazione opzionale per verifica hostname SSL
         self.verify_hostname = bool(cfg.get("verify_hostname", True))
 
+        # Sessione HTTP persistente: connessione TCP e sessione TLS vengono
+        # riutilizzate tra richieste successive invece di rinegoziare
+        # l'handshake mTLS ad ogni chiamata. CA e certificato client sono
+        # già caricati nel contesto condiviso, quindi la sessione non passa
+        # i path dei file a urllib3 (verify=True usa il contesto dell'adapter)
+        self.ssl_context = _ssl_context(*self.cert, self.verify, tuple(signature))
+        self.session = requests.Session()
+        # pool_block=True: oltre pool_maxsize richieste concorrenti i thread
+        # attendono una connessione libera invece di aprirne una nuova
+        # (nuovo handshake) e scartarla a fine richiesta
+        # I retry sono gestiti da urllib3 nell'adapter: errori di connessione
+        # e risposte 502/503/504 transitorie vengono ritentate con backoff
+        # esponenziale (0s, 0.8s, 1.6s, ...), rispettando Retry-After.
+        # Esauriti i tentativi l'ultima risposta passa comunque a _handle.
+        # Le richieste che consumano chiavi ritentano solo gli errori di
+        # connessione (vedi _KeyAwareRetry)
+        retries = _KeyAwareRetry(
+            total=self.retries,
+            backoff_factor=0.4,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        self.session.mount("https://", _SSLContextAdapter(
+            self.ssl_context, pool_connections=1,
+            pool_maxsize=self.pool_maxsize, pool_block=True,
+            max_retries=retries,
+        ))
+
+    def close(self) -> None:
+        """
+        Chiude la sessione HTTP e rilascia le connessioni aperte verso il KME.
+        """
+        self.session.close()
+
     def _url(self, key_or_path: str, **kwargs) -> str:
         """
         Costruisce l'URL completo per una richiesta API.
@@ -204,7 +332,6 @@ class QKDClient:
         # Costruisci l'URL completo
         return f"{self.base_url}{path}"
 
-    @retry((requests.RequestException,), tries=3, delay=0.8)
     def _request(self, method: str, url: str, **kwargs) -> requests.Response:
         """
         Esegue una richiesta HTTP con retry automatico e configurazione mTLS.
@@ -212,7 +339,8 @@ class QKDClient:
         Questo metodo è il cuore delle comunicazioni con i KME:
         - Configura automaticamente mTLS con i certificati
         - Applica timeout configurato
-        - Usa retry automatico per robustezza
+        - Usa retry automatico (adapter urllib3) per robustezza
+        - Riutilizza la sessione persistente (keep-alive + ripresa sessione TLS)
         
         Args:
             method: Metodo HTTP ("GET", "POST", etc.)
@@ -223,18 +351,17 @@ class QKDClient:
             requests.Response: Risposta HTTP grezza
         
         Note:
-            - Il decorator @retry gestisce automaticamente i fallimenti temporanei
-            - mTLS è configurato automaticamente con cert/key/ca
+            - I fallimenti temporanei sono ritentati dall'adapter della sessione
+            - mTLS è configurato una volta nel contesto TLS della sessione
             - Il timeout previene richieste bloccate indefinitamente
         """
         # Configura parametri default se non già specificati
+        # (certificato client e CA sono nel contesto TLS della sessione)
         kwargs.setdefault("timeout", self.timeout)  # Timeout HTTP
-        kwargs.setdefault("cert", self.cert)        # Certificato client (mTLS)
-        kwargs.setdefault("verify", self.verify)    # CA per verifica server
         
         # Esegui la richiesta HTTP
-        # Il decorator @retry gestirà eventuali eccezioni di rete
-        r = requests.request(method=method, url=url, **kwargs)
+        # I retry su errori di rete e 502/503/504 avvengono nell'adapter
+        r = self.session.request(method=method, url=url, **kwargs)
         return r
 
     def _handle(self, r: requests.Response) -> Any:
@@ -283,9 +410,10 @@ class QKDClient:
         
         # Parsing della risposta di successo
         try:
-            # La maggior parte delle risposte ETSI sono in formato JSON
-            return r.json()
-        except json.JSONDecodeError:
+            # La maggior parte delle risposte ETSI sono in formato JSON:
+            # si parsano direttamente i byte, senza decodificare prima il testo
+            return _json_loads(r.content)
+        except ValueError:
             # Fallback per risposte in formato testo
             return r.text
 
@@ -402,8 +530,27 @@ class QKDClient:
             - Verificare se un link QKD è attivo prima di richiedere chiavi
             - Monitorare la disponibilità di chiavi quantistiche
             - Ottenere limiti operativi per ottimizzare le richieste
+        
+        Cache:
+            La risposta resta in memoria per `status_cache_sec` secondi
+            (default 2): chiamate ravvicinate per lo stesso slave_id non
+            generano nuove richieste al KME. La cache viene svuotata da
+            get_key() e get_key_with_ids(), che modificano i contatori.
         """
-        return self.get("status", slave_id=slave_id)
+        if self.status_cache_sec > 0:
+            cached = self._status_cache.get(slave_id)
+            if cached is not None and time.monotonic() - cached[0] < self.status_cache_sec:
+                return _copy_status(cached[1])
+        
+        status = self.get("status", slave_id=slave_id)
+        if isinstance(status, dict):
+            self._link_limits[slave_id] = dict(status)
+        
+        # Cache e limiti conservano copie: il chiamante può modificare la
+        # risposta restituita senza alterarli
+        if self.status_cache_sec > 0:
+            self._status_cache[slave_id] = (time.monotonic(), _copy_status(status))
+        return status
 
     def get_key(self, slave_id: str, 
                 number: Optional[int] = None,
@@ -475,6 +622,17 @@ class QKDClient:
                 f"Parametro 'size' deve essere multiplo di 8 secondo ETSI GS QKD 014. "
                 f"Valore ricevuto: {size}"
             )
+        if number is not None and number < 1:
+            raise QKDClientError(
+                f"Parametro 'number' deve essere almeno 1. Valore ricevuto: {number}"
+            )
+        
+        # Se lo status del link è già noto, i limiti del KME vengono verificati
+        # in locale: una richiesta non valida non costa un round-trip
+        # (nessuna richiesta di status aggiuntiva viene fatta a questo scopo)
+        limits = self._link_limits.get(slave_id)
+        if limits:
+            self._check_link_limits(limits, number, size, additional_slave_SAE_IDs)
         
         # Costruisci parametri query per la richiesta
         params = {}
@@ -495,9 +653,43 @@ class QKDClient:
         if extension_optional:
             params["extension_optional"] = json.dumps(extension_optional)
         
+        # Le chiavi consumate cambiano stored_key_count: invalida la cache di status
+        self._status_cache.clear()
+        
         # Esegui la richiesta con i parametri costruiti
         return self.get("enc_keys", params=params if params else None, slave_id=slave_id)
 
+    @staticmethod
+    def _check_link_limits(limits: dict, number: Optional[int], size: Optional[int],
+                           additional_slave_SAE_IDs: Optional[List[str]]) -> None:
+        """
+        Verifica i parametri di get_key() contro i limiti riportati da get_status().
+        
+        Raises:
+            QKDClientError: Se number, size o il numero di SAE aggiuntivi
+                           superano i limiti dichiarati dal KME
+        """
+        max_per_request = limits.get("max_key_per_request")
+        if number is not None and max_per_request is not None and number > max_per_request:
+            raise QKDClientError(
+                f"Parametro 'number' ({number}) supera max_key_per_request ({max_per_request})"
+            )
+        
+        min_size = limits.get("min_key_size")
+        max_size = limits.get("max_key_size")
+        if size is not None and ((min_size is not None and size < min_size)
+                                 or (max_size is not None and size > max_size)):
+            raise QKDClientError(
+                f"Parametro 'size' ({size}) fuori dai limiti del KME ({min_size}-{max_size})"
+            )
+        
+        max_sae = limits.get("max_SAE_ID_count")
+        if additional_slave_SAE_IDs and max_sae is not None and len(additional_slave_SAE_IDs) > max_sae:
+            raise QKDClientError(
+                f"Troppi SAE ID aggiuntivi ({len(additional_slave_SAE_IDs)}): "
+                f"max_SAE_ID_count è {max_sae}"
+            )
+
     def get_key_with_ids(self, master_id: str, key_IDs: List[str]) -> dict:
         """
         GET /api/v1/keys/{master_id}/dec_keys
@@ -570,5 +762,8 @@ class QKDClient:
             # Formato multiplo: ?key_IDs=uuid1,uuid2,uuid3
             params = {"key_IDs": ",".join(key_IDs)}
         
+        # Le chiavi consumate cambiano stored_key_count: invalida la cache di status
+        self._status_cache.clear()
+        
         # Esegui la richiesta al KME
         return self.get("dec_keys", params=params, master_id=master_id)
\ No newline at end of file
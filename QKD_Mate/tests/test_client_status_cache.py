@@ -0,0 +1,138 @@
+"""
+Test della cache di status e dei limiti del link in QKDClient.
+
+get_status() tiene in memoria le risposte per status_cache_sec secondi e
+memorizza i limiti del link usati da get_key() per validare le richieste
+in locale. Il client viene costruito senza configurazione né certificati e
+il metodo get() è sostituito da uno stub che conta le richieste.
+
+Uso (dalla directory principale del progetto):
+    python -m unittest discover tests
+"""
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.client import QKDClient  # noqa: E402
+from src.utils import QKDClientError  # noqa: E402
+
+STATUS = {
+    "stored_key_count": 25000,
+    "max_key_per_request": 128,
+    "min_key_size": 64,
+    "max_key_size": 1024,
+    "max_SAE_ID_count": 0,
+}
+
+
+def _make_client(status_cache_sec=2.0):
+    """QKDClient senza sessione HTTP: get() restituisce copie di STATUS o {"keys": []}"""
+    client = QKDClient.__new__(QKDClient)
+    client.status_cache_sec = status_cache_sec
+    client._status_cache = {}
+    client._link_limits = {}
+    client.get = mock.Mock(
+        side_effect=lambda key, params=None, **kw: dict(STATUS) if key == "status" else {"keys": []}
+    )
+    return client
+
+
+def _status_calls(client):
+    return sum(1 for c in client.get.call_args_list if c.args[0] == "status")
+
+
+class StatusCacheTest(unittest.TestCase):
+    def test_cache_hit_within_ttl(self):
+        client = _make_client()
+        with mock.patch("src.client.time.monotonic", return_value=100.0):
+            client.get_status("Bob2")
+        with mock.patch("src.client.time.monotonic", return_value=101.5):
+            client.get_status("Bob2")
+        self.assertEqual(_status_calls(client), 1)
+
+    def test_cache_miss_after_ttl(self):
+        client = _make_client()
+        with mock.patch("src.client.time.monotonic", return_value=100.0):
+            client.get_status("Bob2")
+        with mock.patch("src.client.time.monotonic", return_value=102.0):
+            client.get_status("Bob2")
+        self.assertEqual(_status_calls(client), 2)
+
+    def test_cache_disabled(self):
+        client = _make_client(status_cache_sec=0)
+        client.get_status("Bob2")
+        client.get_status("Bob2")
+        self.assertEqual(_status_calls(client), 2)
+        self.assertEqual(client._status_cache, {})
+
+    def test_cache_cleared_by_get_key(self):
+        client = _make_client()
+        client.get_status("Bob2")
+        client.get_key("Bob2")
+        self.assertEqual(client._status_cache, {})
+        client.get_status("Bob2")
+        self.assertEqual(_status_calls(client), 2)
+
+    def test_cache_cleared_by_get_key_with_ids(self):
+        client = _make_client()
+        client.get_status("Alice2")
+        client.get_key_with_ids("Alice2", ["id-1"])
+        self.assertEqual(client._status_cache, {})
+        client.get_status("Alice2")
+        self.assertEqual(_status_calls(client), 2)
+
+    def test_mutating_result_does_not_touch_cache_or_limits(self):
+        client = _make_client()
+        first = client.get_status("Bob2")
+        first["stored_key_count"] = 0
+        first["max_key_per_request"] = 1
+
+        second = client.get_status("Bob2")
+        self.assertEqual(second["stored_key_count"], 25000)
+        self.assertEqual(client._link_limits["Bob2"]["max_key_per_request"], 128)
+
+        second["stored_key_count"] = 0
+        self.assertEqual(client.get_status("Bob2")["stored_key_count"], 25000)
+
+
+class LinkLimitsTest(unittest.TestCase):
+    def setUp(self):
+        self.client = _make_client()
+        self.client.get_status("Bob2")
+        self.client.get.reset_mock()
+
+    def test_number_over_max_key_per_request(self):
+        with self.assertRaises(QKDClientError):
+            self.client.get_key("Bob2", number=129)
+        self.client.get.assert_not_called()
+
+    def test_size_out_of_range(self):
+        with self.assertRaises(QKDClientError):
+            self.client.get_key("Bob2", size=2048)
+        with self.assertRaises(QKDClientError):
+            self.client.get_key("Bob2", size=32)
+        self.client.get.assert_not_called()
+
+    def test_too_many_additional_slaves(self):
+        with self.assertRaises(QKDClientError):
+            self.client.get_key("Bob2", additional_slave_SAE_IDs=["Charlie2"])
+        self.client.get.assert_not_called()
+
+    def test_request_within_limits(self):
+        self.client.get_key("Bob2", number=128, size=1024)
+        self.client.get.assert_called_once_with(
+            "enc_keys", params={"number": 128, "size": 1024}, slave_id="Bob2"
+        )
+
+    def test_unknown_link_not_validated(self):
+        self.client.get_key("Charlie2", number=1000)
+        self.client.get.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
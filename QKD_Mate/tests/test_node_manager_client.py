@@ -0,0 +1,79 @@
+"""
+Test della ricreazione del client QKD nel node manager.
+
+Quando i certificati client su disco vengono sostituiti, QKDNodeManager.client
+deve chiudere il vecchio client e restituirne uno nuovo, con un nuovo
+SSLContext; non l'istanza memoizzata da alice_client().
+
+Richiede il comando openssl per generare certificati di prova.
+
+Uso (dalla directory principale del progetto):
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _make_cert(certs_dir, name, common_name):
+    """Genera un certificato autofirmato con chiave EC in certs_dir/name.{crt,key}"""
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "ec",
+         "-pkeyopt", "ec_paramgen_curve:prime256v1", "-nodes", "-days", "1",
+         "-subj", f"/CN={common_name}",
+         "-keyout", str(certs_dir / f"{name}.key"),
+         "-out", str(certs_dir / f"{name}.crt")],
+        check=True, capture_output=True,
+    )
+
+
+@unittest.skipIf(shutil.which("openssl") is None, "openssl non disponibile")
+class CertificateRotationTest(unittest.TestCase):
+    def setUp(self):
+        # I path dei certificati in config/*.yaml sono relativi alla directory
+        # corrente: il test lavora in una directory temporanea con il suo certs/
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        os.chdir(self._tmp.name)
+        self.addCleanup(os.chdir, self._cwd)
+
+        self.certs_dir = Path(self._tmp.name) / "certs"
+        self.certs_dir.mkdir()
+        _make_cert(self.certs_dir, "ca_alice", "ca")
+        _make_cert(self.certs_dir, "client_Alice2", "Alice2")
+
+        if str(PROJECT_ROOT) not in sys.path:
+            sys.path.insert(0, str(PROJECT_ROOT))
+        # Senza node_config.yaml nella directory corrente il modulo usa il nodo Alice
+        sys.modules.pop("qkd_node_manager", None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import qkd_node_manager
+        self.module = qkd_node_manager
+        self.addCleanup(sys.modules.pop, "qkd_node_manager", None)
+
+    def test_rotated_certificates_give_new_client(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = self.module.QKDNodeManager(check_certs=False)
+        first = manager.client
+        self.assertIs(manager.client, first)
+
+        # Sostituzione dei certificati client (nuova chiave, nuovo soggetto)
+        _make_cert(self.certs_dir, "client_Alice2", "Alice2-rotated")
+        manager._cert_checked_at = float("-inf")  # Salta l'attesa di CERT_RECHECK_SEC
+
+        second = manager.client
+        self.assertIsNot(second, first)
+        self.assertIsNot(second.ssl_context, first.ssl_context)
+
+
+if __name__ == "__main__":
+    unittest.main()